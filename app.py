@@ -1,293 +1,318 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context, url_for
 import io
-import pandas as pd
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+import json
+import os
+import threading
+import time
+import http_cache
+from storage import CaseStore
+import bulk_import
+import export
+import pdf_reports
+import click
+import metrics
+import symptom_match
+import sys
 from datetime import datetime
 
-app = Flask(__name__)
-
-# --------- Diseases, Symptoms and Advice ----------
-DISEASES = [
-    "Malaria", "Covid-19", "Dengue", "Typhoid", "Cholera",
-    "Influenza", "Chickenpox", "Measles", "Hepatitis A", "Common Cold"
-]
-
-SYMPTOMS = {
-    "en": [
-        "fever","headache","cough","sore throat","fatigue","chills",
-        "body ache","rash","nausea","vomiting","diarrhea","loss of smell",
-        "loss of taste","bleeding","abdominal pain","yellow skin",
-        "runny nose","sneezing","itchy eyes","joint pain"
-    ],
-    "hi": [
-        "बुखार","सर दर्द","खांसी","गले में खराश","थकान","सर्दी",
-        "शरीर में दर्द","दाने","उल्टी","मतली","दस्त","गंध न आना",
-        "स्वाद न आना","खून बहना","पेट दर्द","पीली त्वचा",
-        "नाक बहना","छींक", "खुजली आंखें","जोड़ दर्द"
-    ],
-    "mr": [
-        "ताप","डोकेदुखी","खोकला","घशाचा वेदना","थकवा","थंडी",
-        "शरीरात वेदना","रॅश","उलटी","अजीर्ण","स्तूल","वास न येणे",
-        "चव न येणे","रक्तस्राव","पोटदुखी","सोंडे पिवळे",
-        "नाक वाहणं","हाचक","डोळ्यात खाज","सांधे वेदना"
-    ]
-}
+# --------- Run ----------
+# `python app.py` serves this module through the flask CLI before any of the
+# setup below runs: spawned processes (the PDF report pool) re-run the main
+# script of their parent, so it must not be this file.
+if __name__ == "__main__":
+    os.execv(sys.executable, [sys.executable, "-m", "flask", "--app", "app", "run", "--debug", "--port", "5000"])
 
-DISEASE_SYMPTOMS = {
-    "Malaria": ["fever","chills","headache","fatigue","body ache"],
-    "Covid-19": ["fever","cough","fatigue","loss of smell","loss of taste","sore throat"],
-    "Dengue": ["fever","headache","rash","joint pain","bleeding","body ache"],
-    "Typhoid": ["fever","headache","abdominal pain","diarrhea","nausea"],
-    "Cholera": ["diarrhea","vomiting","abdominal pain","dehydration"],
-    "Influenza": ["fever","cough","sore throat","fatigue","body ache"],
-    "Chickenpox": ["fever","rash","itchy eyes","fatigue"],
-    "Measles": ["fever","rash","cough","runny nose","red eyes"],
-    "Hepatitis A": ["fever","nausea","vomiting","yellow skin","abdominal pain"],
-    "Common Cold": ["runny nose","sneezing","sore throat","cough","headache"]
-}
+app = Flask(__name__)
 
-ADVICE = {
-    "Malaria": {
-        "en": "See a doctor urgently. Drink fluids and get tested (blood smear/rapid test).",
-        "hi": "तुरंत डॉक्टर से मिलें। तरल पदार्थ पिएं और ब्लड टेस्ट करवाएँ।",
-        "mr": "तुरंत डॉक्टरकडे जा. द्रव प्या आणि रक्तचाचणी करा."
-    },
-    "Covid-19": {
-        "en": "Isolate, test (RT-PCR/Antigen), monitor oxygen and seek care if breathing difficulty.",
-        "hi": "आइसोलेट रहें, टेस्ट करवाएँ और सांस में दिक्कत होने पर तुरंत मदद लें।",
-        "mr": "एकांतवास करा, टेस्ट करा आणि श्वासोच्छवास अडचण असल्यास त्वरीत वैद्यकीय मदत घ्या."
-    },
-    "Dengue": {
-        "en": "Hydrate well, monitor platelets. Visit clinic for testing and monitoring.",
-        "hi": "अच्छी तरह हाइड्रेट रहें, प्लेटलेट्स की जाँच कराएँ।",
-        "mr": "पाणी भरपूर प्या, प्लेटलेट तपासा, क्लिनिकला भेट द्या."
-    },
-    "Typhoid": {
-        "en": "Antibiotics needed after confirming diagnosis. Maintain hydration and hygiene.",
-        "hi": "निदान के बाद एंटीबायोटिक लेना जरूरी है। हाइजीन और हाइड्रेशन बनाए रखें।",
-        "mr": "निदानानंतर अँटीबायोटिक आवश्यक. स्वच्छता व द्रवपदार्थ ठेवा."
-    },
-    "Cholera": {
-        "en": "Immediate rehydration therapy; seek urgent medical care.",
-        "hi": "तुरंत री-हाइड्रेशन और चिकित्सा सहायता लें।",
-        "mr": "त्वरीत द्रवपुनर्भरण व वैद्यकीय मदत घ्या."
-    },
-    "Influenza": {
-        "en": "Rest, fluids, symptomatic care; antiviral if indicated.",
-        "hi": "आराम करें, तरल पदार्थ पिएं, जरुरी होने पर एंटीवायरल।",
-        "mr": "आलस, द्रवपदार्थ, गरजेप्रमाणे औषधं."
-    },
-    "Chickenpox": {
-        "en": "Isolate, symptomatic care, see doctor for severe cases.",
-        "hi": "आइसोलेट रहें, हल्का इलाज, गंभीर होने पर डॉक्टर दिखाएँ।",
-        "mr": "एकांतवास करा, लक्षणानुसार उपचार करा, गंभीर असला तर डॉक्टरकडे जा."
-    },
-    "Measles": {
-        "en": "Supportive care; prevent spread; see a doctor for complications.",
-        "hi": "सहायक उपचार और संक्रमण से बचाव। जटिलता पर डॉक्टर दिखाएँ।",
-        "mr": "साहाय्यक उपचार, फैलण्यापासून रोखा, जटिलतेसाठी डॉक्टरकडे जा."
-    },
-    "Hepatitis A": {
-        "en": "Rest, avoid alcohol, consult doctor for liver tests and care.",
-        "hi": "आराम करें, शराब से बचें और लिवर टेस्ट करवाएँ।",
-        "mr": "आराम, द्राक्षारस टाळा, यकृत चाचण्या करवा."
-    },
-    "Common Cold": {
-        "en": "Rest, fluids, symptomatic treatment (paracetamol, decongestant).",
-        "hi": "आराम करें, तरल पदार्थ पिएं और लक्षणों के अनुसार दवा लें।",
-        "mr": "आराम करा, द्रवपदार्थ प्या, लक्षणानुसार उपचार करा."
+# --------- Instrumentation ----------
+# under gunicorn the workers share DISEASE_APP_METRICS_DIR, so /metrics covers all of them
+METRICS = metrics.Metrics(directory=os.environ.get("DISEASE_APP_METRICS_DIR") or None)
+PROFILER = metrics.Profiler(
+    os.path.join(app.instance_path, "profiles"),
+    enabled=os.environ.get("DISEASE_APP_PROFILING") == "1",
+    sample_rate=float(os.environ.get("DISEASE_APP_PROFILE_SAMPLE", "0")),
+)
+metrics.init_app(app, METRICS, PROFILER)
+
+# --------- Diseases, Symptoms, Advice and Case Data ----------
+# The tables live in data/tables.json: parsing it is faster than building
+# the equivalent literals, and keeps this module small.
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tables.json"), encoding="utf-8") as f:
+    _TABLES = json.load(f)
+
+DISEASES = _TABLES["DISEASES"]
+SYMPTOMS = _TABLES["SYMPTOMS"]
+DISEASE_SYMPTOMS = _TABLES["DISEASE_SYMPTOMS"]
+ADVICE = _TABLES["ADVICE"]
+# Extra spellings per canonical English symptom, for free-text matching
+SYNONYMS = _TABLES["SYNONYMS"]
+# State & year-wise case counts (2020-2025); seeds the case store on first start
+STATEWISE_YEARLY = _TABLES["STATEWISE_YEARLY"]
+
+# --------- Persistence, Data Version & Response Cache ----------
+# Case counts persist in SQLite, shared by every worker process. DATA_VERSION
+# is the store version this process has seen; read-only API responses are
+# cached (with compressed copies) per version and validated with ETags.
+# The case cube (and numpy with it) is only loaded when a route needs it.
+STORE = CaseStore(os.environ.get("DISEASE_APP_DB", os.path.join(app.instance_path, "cases.db")))
+CASES = None
+FORECASTER = None
+DATA_VERSION = 0
+RESPONSE_CACHE = http_cache.ResponseCache()
+# Finished /api/predict bodies per (sorted normalized symptoms, lang); cleared
+# by rebuild_symptom_index() when the disease tables or advice change.
+PREDICT_CACHE = http_cache.CoalescingCache(
+    max_entries=int(os.environ.get("DISEASE_APP_PREDICT_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("DISEASE_APP_PREDICT_CACHE_TTL", "600")),
+)
+EXPORT_CACHE = export.ExportCache(os.path.join(app.instance_path, "exports"))
+_sync_lock = threading.Lock()
+
+def get_cases():
+    """The CaseCube, loaded from the store on first use."""
+    global CASES, DATA_VERSION
+    if CASES is None:
+        with _sync_lock:
+            if CASES is None:
+                from cases import CaseCube
+                cube = CaseCube.from_nested(STATEWISE_YEARLY, diseases=DISEASES)
+                version, rows = STORE.changes_since(0)
+                for disease, state, year, cases in rows:
+                    if cube.has_cell(disease, state, year):
+                        cube.set(disease, state, year, cases)
+                if version != DATA_VERSION:
+                    DATA_VERSION = version
+                    RESPONSE_CACHE.clear()
+                CASES = cube
+    return CASES
+
+def sync_cases():
+    """Apply rows other processes (or this one) wrote since DATA_VERSION to CASES."""
+    global DATA_VERSION
+    if STORE.version() == DATA_VERSION:
+        return DATA_VERSION
+    with _sync_lock:
+        version, rows = STORE.changes_since(DATA_VERSION)
+        if version == DATA_VERSION:
+            return DATA_VERSION
+        if CASES is not None:
+            applied = [row for row in rows if CASES.has_cell(*row[:3])]
+            for disease, state, year, cases in applied:
+                CASES.set(disease, state, year, cases)
+            if FORECASTER is not None:
+                FORECASTER.mark_changed(CASES, applied)
+        DATA_VERSION = version
+        RESPONSE_CACHE.clear()
+    return DATA_VERSION
+
+def save_cases(rows):
+    """Persist (disease, state, year, cases) rows as one batch and apply them."""
+    STORE.write_many(rows)
+    return sync_cases()
+
+STORE.seed(
+    (disease, state, year, cases)
+    for disease, by_state in STATEWISE_YEARLY.items()
+    for state, by_year in by_state.items()
+    for year, cases in by_year.items()
+)
+sync_cases()
+
+@app.before_request
+def _check_data_version():
+    sync_cases()
+
+METRICS.gauge("app_data_version", "Case data version loaded in this process.",
+              lambda: {(): DATA_VERSION})
+METRICS.gauge("app_response_cache_entries", "Serialized responses held in the response cache.",
+              lambda: {(): len(RESPONSE_CACHE)})
+METRICS.counter("app_predict_cache_lookups_total", "Prediction cache lookups by result.",
+                lambda: {(("result", k),): v for k, v in PREDICT_CACHE.stats().items()
+                         if k in ("hits", "misses", "coalesced")})
+METRICS.gauge("app_predict_cache_hit_ratio", "Share of prediction requests served without scoring.",
+              lambda: {(): round(PREDICT_CACHE.stats()["hit_rate"], 4)})
+METRICS.gauge("app_predict_cache_entries", "Prediction bodies held in the prediction cache.",
+              lambda: {(): len(PREDICT_CACHE)})
+METRICS.gauge("process_memory_bytes",
+              "Resident memory per process (rss, pss = shared pages split, uss = private).",
+              lambda: {(("kind", k), ("pid", os.getpid())): v for k, v in metrics.process_memory().items()})
+
+def cached_json(build):
+    """Serve build() -> data or (data, status) from the response cache for this URL."""
+    def serialize():
+        result = build()
+        data, status = result if isinstance(result, tuple) else (result, 200)
+        return app.json.dumps(data).encode("utf-8") + b"\n", status
+
+    key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+    entry = RESPONSE_CACHE.get(key, DATA_VERSION, serialize)
+    return http_cache.respond(entry)
+
+# --------- Prediction Index ----------
+def build_symptom_index():
+    """Precompute the lookup tables used by predict_from_symptoms.
+
+    - translate: per-language {symptom: english symptom} reverse dictionaries
+    - inverted: {english symptom: [diseases having it]}
+    - bits / masks: bit position per symptom and an integer bitmask per disease
+    - totals: number of listed symptoms per disease (the score denominator)
+    - matcher: trigram index resolving free text in any language to English symptoms
+    """
+    en = SYMPTOMS["en"]
+    translate = {}
+    for lang, terms in SYMPTOMS.items():
+        if lang == "en":
+            continue
+        mapping = {}
+        for idx, term in enumerate(terms):
+            # keep the first occurrence, like list.index() did
+            mapping.setdefault(term, en[idx] if idx < len(en) else term.lower())
+        translate[lang] = mapping
+
+    bits = {s: i for i, s in enumerate(s.lower() for s in en)}
+    inverted = {}
+    masks = {}
+    totals = {}
+    for disease in DISEASES:
+        disease_sym = [x.lower() for x in DISEASE_SYMPTOMS.get(disease, [])]
+        mask = 0
+        for s in disease_sym:
+            bit = bits.setdefault(s, len(bits))
+            if not mask >> bit & 1:
+                inverted.setdefault(s, []).append(disease)
+            mask |= 1 << bit
+        masks[disease] = mask
+        totals[disease] = len(disease_sym)
+
+    terms = {s: s for s in bits}
+    for mapping in translate.values():
+        terms.update((term, english.lower()) for term, english in mapping.items() if term not in terms)
+    for english, spellings in SYNONYMS.items():
+        terms.update((term, english.lower()) for term in spellings if term not in terms)
+
+    return {
+        "translate": translate,
+        "inverted": inverted,
+        "bits": bits,
+        "masks": masks,
+        "totals": totals,
+        "matcher": symptom_match.SymptomMatcher(terms),
     }
-}
 
-# --------- State & Year-wise Data (2020-2025) for all diseases ----------
-STATEWISE_YEARLY = {
-    "Malaria": {
-        "Maharashtra": {"2020": 450, "2021": 470, "2022": 480, "2023": 500, "2024": 520, "2025": 530},
-        "UP": {"2020": 200, "2021": 210, "2022": 220, "2023": 230, "2024": 240, "2025": 250},
-        "Goa": {"2020": 15, "2021": 18, "2022": 20, "2023": 22, "2024": 23, "2025": 25},
-        "Karnataka": {"2020": 130, "2021": 140, "2022": 145, "2023": 150, "2024": 155, "2025": 160},
-        "Madhya Pradesh": {"2020": 120, "2021": 125, "2022": 130, "2023": 135, "2024": 140, "2025": 145},
-        "Punjab": {"2020": 50, "2021": 52, "2022": 55, "2023": 58, "2024": 60, "2025": 62},
-        "Gujarat": {"2020": 80, "2021": 85, "2022": 90, "2023": 95, "2024": 100, "2025": 105},
-        "Rajasthan": {"2020": 70, "2021": 75, "2022": 78, "2023": 80, "2024": 85, "2025": 90},
-        "Assam": {"2020": 30, "2021": 32, "2022": 35, "2023": 37, "2024": 40, "2025": 42},
-        "Bihar": {"2020": 60, "2021": 65, "2022": 68, "2023": 70, "2024": 72, "2025": 75},
-        "Odisha": {"2020": 40, "2021": 45, "2022": 48, "2023": 50, "2024": 52, "2025": 55},
-        "Uttarakhand": {"2020": 20, "2021": 22, "2022": 23, "2023": 25, "2024": 27, "2025": 30},
-        "West Bengal": {"2020": 90, "2021": 95, "2022": 100, "2023": 105, "2024": 110, "2025": 115},
-    },
-    "Covid-19": {
-        "Maharashtra": {"2020": 300, "2021": 800, "2022": 1000, "2023": 1200, "2024": 1100, "2025": 900},
-        "UP": {"2020": 250, "2021": 600, "2022": 800, "2023": 900, "2024": 850, "2025": 800},
-        "Goa": {"2020": 30, "2021": 60, "2022": 80, "2023": 100, "2024": 90, "2025": 80},
-        "Karnataka": {"2020": 150, "2021": 400, "2022": 500, "2023": 600, "2024": 550, "2025": 500},
-        "Madhya Pradesh": {"2020": 120, "2021": 300, "2022": 400, "2023": 450, "2024": 420, "2025": 400},
-        "Punjab": {"2020": 50, "2021": 120, "2022": 150, "2023": 180, "2024": 170, "2025": 160},
-        "Gujarat": {"2020": 80, "2021": 200, "2022": 250, "2023": 300, "2024": 280, "2025": 260},
-        "Rajasthan": {"2020": 70, "2021": 180, "2022": 220, "2023": 250, "2024": 240, "2025": 230},
-        "Assam": {"2020": 20, "2021": 50, "2022": 70, "2023": 80, "2024": 75, "2025": 70},
-        "Bihar": {"2020": 60, "2021": 120, "2022": 150, "2023": 180, "2024": 170, "2025": 160},
-        "Odisha": {"2020": 40, "2021": 80, "2022": 100, "2023": 120, "2024": 110, "2025": 100},
-        "Uttarakhand": {"2020": 10, "2021": 30, "2022": 40, "2023": 50, "2024": 45, "2025": 40},
-        "West Bengal": {"2020": 90, "2021": 220, "2022": 300, "2023": 350, "2024": 330, "2025": 300},
-    },
-    "Dengue": {
-        "Maharashtra": {"2020": 600, "2021": 650, "2022": 680, "2023": 700, "2024": 720, "2025": 740},
-        "UP": {"2020": 300, "2021": 320, "2022": 340, "2023": 360, "2024": 370, "2025": 380},
-        "Goa": {"2020": 20, "2021": 25, "2022": 28, "2023": 30, "2024": 32, "2025": 35},
-        "Karnataka": {"2020": 250, "2021": 270, "2022": 280, "2023": 300, "2024": 310, "2025": 320},
-        "Madhya Pradesh": {"2020": 200, "2021": 210, "2022": 220, "2023": 230, "2024": 240, "2025": 250},
-        "Punjab": {"2020": 60, "2021": 65, "2022": 70, "2023": 75, "2024": 78, "2025": 80},
-        "Gujarat": {"2020": 90, "2021": 95, "2022": 100, "2023": 105, "2024": 110, "2025": 115},
-        "Rajasthan": {"2020": 50, "2021": 55, "2022": 58, "2023": 60, "2024": 65, "2025": 70},
-        "Assam": {"2020": 40, "2021": 45, "2022": 48, "2023": 50, "2024": 52, "2025": 55},
-        "Bihar": {"2020": 70, "2021": 75, "2022": 78, "2023": 80, "2024": 82, "2025": 85},
-        "Odisha": {"2020": 30, "2021": 32, "2022": 35, "2023": 38, "2024": 40, "2025": 42},
-        "Uttarakhand": {"2020": 15, "2021": 18, "2022": 20, "2023": 22, "2024": 24, "2025": 25},
-        "West Bengal": {"2020": 80, "2021": 85, "2022": 90, "2023": 95, "2024": 100, "2025": 105},
-    },
-    "Typhoid": {
-        "Maharashtra": {"2020": 180, "2021": 190, "2022": 195, "2023": 200, "2024": 210, "2025": 220},
-        "UP": {"2020": 100, "2021": 105, "2022": 110, "2023": 115, "2024": 120, "2025": 125},
-        "Goa": {"2020": 8, "2021": 10, "2022": 12, "2023": 13, "2024": 14, "2025": 15},
-        "Karnataka": {"2020": 90, "2021": 95, "2022": 100, "2023": 105, "2024": 110, "2025": 115},
-        "Madhya Pradesh": {"2020": 70, "2021": 75, "2022": 78, "2023": 80, "2024": 85, "2025": 90},
-        "Punjab": {"2020": 40, "2021": 42, "2022": 45, "2023": 48, "2024": 50, "2025": 52},
-        "Gujarat": {"2020": 60, "2021": 65, "2022": 68, "2023": 70, "2024": 72, "2025": 75},
-        "Rajasthan": {"2020": 50, "2021": 52, "2022": 55, "2023": 58, "2024": 60, "2025": 62},
-        "Assam": {"2020": 25, "2021": 27, "2022": 28, "2023": 30, "2024": 32, "2025": 33},
-        "Bihar": {"2020": 40, "2021": 42, "2022": 45, "2023": 48, "2024": 50, "2025": 52},
-        "Odisha": {"2020": 20, "2021": 22, "2022": 25, "2023": 28, "2024": 30, "2025": 32},
-        "Uttarakhand": {"2020": 10, "2021": 12, "2022": 13, "2023": 15, "2024": 17, "2025": 18},
-        "West Bengal": {"2020": 45, "2021": 48, "2022": 50, "2023": 52, "2024": 55, "2025": 58},
-    },
-    "Cholera": {
-        "Maharashtra": {"2020": 50, "2021": 52, "2022": 55, "2023": 60, "2024": 62, "2025": 65},
-        "UP": {"2020": 30, "2021": 32, "2022": 35, "2023": 38, "2024": 40, "2025": 42},
-        "Goa": {"2020": 3, "2021": 4, "2022": 5, "2023": 6, "2024": 6, "2025": 7},
-        "Karnataka": {"2020": 20, "2021": 22, "2022": 25, "2023": 28, "2024": 30, "2025": 32},
-        "Madhya Pradesh": {"2020": 18, "2021": 20, "2022": 22, "2023": 24, "2024": 25, "2025": 26},
-        "Punjab": {"2020": 8, "2021": 9, "2022": 10, "2023": 11, "2024": 12, "2025": 12},
-        "Gujarat": {"2020": 12, "2021": 13, "2022": 14, "2023": 15, "2024": 16, "2025": 17},
-        "Rajasthan": {"2020": 10, "2021": 11, "2022": 12, "2023": 13, "2024": 14, "2025": 15},
-        "Assam": {"2020": 6, "2021": 6, "2022": 7, "2023": 8, "2024": 8, "2025": 9},
-        "Bihar": {"2020": 12, "2021": 12, "2022": 13, "2023": 14, "2024": 15, "2025": 16},
-        "Odisha": {"2020": 5, "2021": 6, "2022": 6, "2023": 7, "2024": 8, "2025": 9},
-        "Uttarakhand": {"2020": 3, "2021": 3, "2022": 4, "2023": 4, "2024": 5, "2025": 5},
-        "West Bengal": {"2020": 15, "2021": 16, "2022": 17, "2023": 18, "2024": 19, "2025": 20},
-    },
-    "Influenza": {
-        "Maharashtra": {"2020": 280, "2021": 290, "2022": 300, "2023": 310, "2024": 320, "2025": 330},
-        "UP": {"2020": 150, "2021": 160, "2022": 170, "2023": 180, "2024": 190, "2025": 200},
-        "Goa": {"2020": 12, "2021": 13, "2022": 14, "2023": 15, "2024": 16, "2025": 17},
-        "Karnataka": {"2020": 140, "2021": 145, "2022": 150, "2023": 155, "2024": 160, "2025": 165},
-        "Madhya Pradesh": {"2020": 110, "2021": 115, "2022": 120, "2023": 125, "2024": 130, "2025": 135},
-        "Punjab": {"2020": 45, "2021": 48, "2022": 50, "2023": 52, "2024": 55, "2025": 58},
-        "Gujarat": {"2020": 70, "2021": 75, "2022": 78, "2023": 80, "2024": 85, "2025": 88},
-        "Rajasthan": {"2020": 60, "2021": 62, "2022": 65, "2023": 68, "2024": 70, "2025": 72},
-        "Assam": {"2020": 25, "2021": 27, "2022": 28, "2023": 30, "2024": 32, "2025": 33},
-        "Bihar": {"2020": 50, "2021": 52, "2022": 55, "2023": 58, "2024": 60, "2025": 62},
-        "Odisha": {"2020": 35, "2021": 36, "2022": 38, "2023": 40, "2024": 42, "2025": 45},
-        "Uttarakhand": {"2020": 18, "2021": 19, "2022": 20, "2023": 22, "2024": 23, "2025": 25},
-        "West Bengal": {"2020": 75, "2021": 78, "2022": 80, "2023": 82, "2024": 85, "2025": 88},
-    },
-    "Chickenpox": {
-    "Maharashtra": {"2020": 100, "2021": 110, "2022": 115, "2023": 120, "2024": 125, "2025": 130},
-    "UP": {"2020": 60, "2021": 65, "2022": 68, "2023": 70, "2024": 72, "2025": 75},
-    "Goa": {"2020": 8, "2021": 9, "2022": 10, "2023": 10, "2024": 11, "2025": 12},
-    "Karnataka": {"2020": 60, "2021": 65, "2022": 68, "2023": 70, "2024": 72, "2025": 75},
-    "Madhya Pradesh": {"2020": 50, "2021": 52, "2022": 55, "2023": 58, "2024": 60, "2025": 62},
-    "Punjab": {"2020": 30, "2021": 32, "2022": 34, "2023": 36, "2024": 38, "2025": 40},
-    "Gujarat": {"2020": 40, "2021": 42, "2022": 44, "2023": 46, "2024": 48, "2025": 50},
-    "Rajasthan": {"2020": 35, "2021": 37, "2022": 38, "2023": 40, "2024": 42, "2025": 44},
-    "Assam": {"2020": 20, "2021": 22, "2022": 23, "2023": 25, "2024": 26, "2025": 28},
-    "Bihar": {"2020": 40, "2021": 42, "2022": 44, "2023": 46, "2024": 48, "2025": 50},
-    "Odisha": {"2020": 25, "2021": 27, "2022": 28, "2023": 30, "2024": 32, "2025": 34},
-    "Uttarakhand": {"2020": 12, "2021": 13, "2022": 14, "2023": 15, "2024": 16, "2025": 18},
-    "West Bengal": {"2020": 45, "2021": 48, "2022": 50, "2023": 52, "2024": 55, "2025": 58},
-},
-"Measles": {
-    "Maharashtra": {"2020": 40, "2021": 42, "2022": 45, "2023": 50, "2024": 52, "2025": 55},
-    "UP": {"2020": 30, "2021": 32, "2022": 35, "2023": 38, "2024": 40, "2025": 42},
-    "Goa": {"2020": 5, "2021": 6, "2022": 7, "2023": 8, "2024": 8, "2025": 9},
-    "Karnataka": {"2020": 25, "2021": 28, "2022": 30, "2023": 32, "2024": 34, "2025": 36},
-    "Madhya Pradesh": {"2020": 20, "2021": 22, "2022": 23, "2023": 25, "2024": 26, "2025": 28},
-    "Punjab": {"2020": 10, "2021": 12, "2022": 13, "2023": 14, "2024": 15, "2025": 16},
-    "Gujarat": {"2020": 15, "2021": 16, "2022": 18, "2023": 20, "2024": 21, "2025": 22},
-    "Rajasthan": {"2020": 12, "2021": 14, "2022": 15, "2023": 16, "2024": 17, "2025": 18},
-    "Assam": {"2020": 8, "2021": 9, "2022": 10, "2023": 11, "2024": 12, "2025": 13},
-    "Bihar": {"2020": 18, "2021": 20, "2022": 22, "2023": 24, "2024": 25, "2025": 26},
-    "Odisha": {"2020": 10, "2021": 12, "2022": 13, "2023": 14, "2024": 15, "2025": 16},
-    "Uttarakhand": {"2020": 5, "2021": 6, "2022": 7, "2023": 8, "2024": 8, "2025": 9},
-    "West Bengal": {"2020": 22, "2021": 24, "2022": 25, "2023": 26, "2024": 28, "2025": 30},
-},
-"Hepatitis A": {
-    "Maharashtra": {"2020": 70, "2021": 75, "2022": 78, "2023": 80, "2024": 85, "2025": 90},
-    "UP": {"2020": 40, "2021": 42, "2022": 45, "2023": 48, "2024": 50, "2025": 52},
-    "Goa": {"2020": 5, "2021": 6, "2022": 6, "2023": 7, "2024": 7, "2025": 8},
-    "Karnataka": {"2020": 35, "2021": 38, "2022": 40, "2023": 42, "2024": 45, "2025": 48},
-    "Madhya Pradesh": {"2020": 30, "2021": 32, "2022": 34, "2023": 36, "2024": 38, "2025": 40},
-    "Punjab": {"2020": 15, "2021": 16, "2022": 18, "2023": 19, "2024": 20, "2025": 21},
-    "Gujarat": {"2020": 20, "2021": 22, "2022": 24, "2023": 25, "2024": 26, "2025": 28},
-    "Rajasthan": {"2020": 18, "2021": 20, "2022": 22, "2023": 23, "2024": 24, "2025": 25},
-    "Assam": {"2020": 10, "2021": 11, "2022": 12, "2023": 13, "2024": 14, "2025": 15},
-    "Bihar": {"2020": 22, "2021": 23, "2022": 24, "2023": 25, "2024": 26, "2025": 27},
-    "Odisha": {"2020": 12, "2021": 13, "2022": 14, "2023": 15, "2024": 16, "2025": 17},
-    "Uttarakhand": {"2020": 6, "2021": 7, "2022": 7, "2023": 8, "2024": 8, "2025": 9},
-    "West Bengal": {"2020": 28, "2021": 30, "2022": 32, "2023": 34, "2024": 36, "2025": 38},
-},
-"Common Cold": {
-    "Maharashtra": {"2020": 850, "2021": 870, "2022": 880, "2023": 900, "2024": 920, "2025": 940},
-    "UP": {"2020": 600, "2021": 620, "2022": 630, "2023": 650, "2024": 670, "2025": 690},
-    "Goa": {"2020": 50, "2021": 55, "2022": 58, "2023": 60, "2024": 62, "2025": 65},
-    "Karnataka": {"2020": 500, "2021": 520, "2022": 530, "2023": 550, "2024": 570, "2025": 590},
-    "Madhya Pradesh": {"2020": 450, "2021": 470, "2022": 480, "2023": 500, "2024": 520, "2025": 540},
-    "Punjab": {"2020": 200, "2021": 210, "2022": 220, "2023": 230, "2024": 240, "2025": 250},
-    "Gujarat": {"2020": 300, "2021": 320, "2022": 330, "2023": 350, "2024": 370, "2025": 380},
-    "Rajasthan": {"2020": 250, "2021": 260, "2022": 270, "2023": 280, "2024": 290, "2025": 300},
-    "Assam": {"2020": 150,"2021": 250, "2022": 220, "2023": 260, "2024": 220, "2025": 350}
-
-}}
+def _batch_matrices(index):
+    """The symptoms x diseases incidence matrix and denominators, built on first batch use."""
+    import numpy as np
+
+    if "incidence" not in index:
+        bits = index["bits"]
+        incidence = np.zeros((len(bits), len(DISEASES)), dtype=np.float64)
+        for j, disease in enumerate(DISEASES):
+            for s in set(x.lower() for x in DISEASE_SYMPTOMS.get(disease, [])):
+                incidence[bits[s], j] = 1.0
+        index["totals_vec"] = np.array([index["totals"][d] for d in DISEASES], dtype=np.float64)
+        index["incidence"] = incidence
+    return index["incidence"], index["totals_vec"]
+
+SYMPTOM_INDEX = build_symptom_index()
+
+def rebuild_symptom_index():
+    """Rebuild SYMPTOM_INDEX; call after changing DISEASES, SYMPTOMS, DISEASE_SYMPTOMS or ADVICE."""
+    global SYMPTOM_INDEX
+    SYMPTOM_INDEX = build_symptom_index()
+    RESPONSE_CACHE.clear()
+    PREDICT_CACHE.clear()
+    return SYMPTOM_INDEX
 
 # --------- Helper Functions ----------
-def predict_from_symptoms(selected_symptoms, lang="en"):
+def normalize_symptoms(selected_symptoms, lang="en", resolved=None):
+    """Map selected symptoms to lowercase English names.
+
+    Terms that are not known symptoms are resolved through the fuzzy matcher
+    ("feaver" -> "fever"). If resolved is a dict it receives, per input,
+    {"symptom": ..., "score": ...} or None when nothing matched.
+    """
+    index = SYMPTOM_INDEX
+    mapping = index["translate"].get(lang, {})
+    bits = index["bits"]
     normalized = []
-    if lang == "en":
-        normalized = [s.lower().strip() for s in selected_symptoms]
-    else:
-        src_list = SYMPTOMS.get(lang, [])
-        for s in selected_symptoms:
-            s = s.strip()
-            if s in src_list:
-                idx = src_list.index(s)
-                normalized.append(SYMPTOMS['en'][idx] if idx < len(SYMPTOMS['en']) else s.lower())
-            else:
-                normalized.append(s.lower())
-
-    raw_scores = {}
-    for disease in DISEASES:
-        disease_sym = [x.lower() for x in DISEASE_SYMPTOMS.get(disease, [])]
-        match_count = sum(1 for s in normalized if s in disease_sym)
-        raw_scores[disease] = (match_count, len(disease_sym))
+    for raw in selected_symptoms:
+        s = raw.strip()
+        name = s.lower() if lang == "en" else mapping.get(s) or s.lower()
+        match = (name, 1.0) if name in bits else index["matcher"].resolve(s)
+        if match:
+            name = match[0]
+        if resolved is not None:
+            resolved[raw] = {"symptom": match[0], "score": match[1]} if match else None
+        normalized.append(name)
+    return normalized
+
+def predict_from_symptoms(selected_symptoms, lang="en", resolved=None):
+    started = time.perf_counter()
+    normalized = normalize_symptoms(selected_symptoms, lang, resolved)
+    METRICS.observe_stage("symptom_normalization", time.perf_counter() - started)
+    return score_symptoms(normalized)
+
+def score_symptoms(normalized):
+    """Probabilities and matched symptoms per disease for normalized English symptoms."""
+    index = SYMPTOM_INDEX
+    started = time.perf_counter()
+
+    # single pass: each symptom credits only the diseases listing it
+    inverted = index["inverted"]
+    bits = index["bits"]
+    matched = {d: [] for d in DISEASES}
+    selected_mask = 0
+    for s in normalized:
+        diseases = inverted.get(s)
+        if diseases:
+            selected_mask |= 1 << bits[s]
+            for d in diseases:
+                matched[d].append(s)
 
     scores = {}
-    for d, (m, total) in raw_scores.items():
-        scores[d] = m / total if total else 0.0
+    total_score = 0.0
+    if selected_mask:
+        totals = index["totals"]
+        masks = index["masks"]
+        for d in DISEASES:
+            if selected_mask & masks[d]:
+                scores[d] = len(matched[d]) / totals[d]
+                total_score += scores[d]
 
-    total_score = sum(scores.values())
     if total_score == 0:
         probs = {d: 0.0 for d in DISEASES}
     else:
-        probs = {d: round((scores[d] / total_score) * 100, 1) for d in DISEASES}
-
-    matched = {}
-    for d in DISEASES:
-        disease_sym = [x.lower() for x in DISEASE_SYMPTOMS.get(d, [])]
-        matched[d] = [s for s in normalized if s in disease_sym]
+        probs = {d: round((scores.get(d, 0.0) / total_score) * 100, 1) for d in DISEASES}
 
+    METRICS.observe_stage("scoring", time.perf_counter() - started)
     return probs, matched
 
+def predict_batch(records, default_lang="en"):
+    """Score many symptom lists at once.
+
+    records is a list of (symptoms, lang) pairs. Returns a patients x diseases
+    array of probabilities, the same values predict_from_symptoms gives.
+    """
+    import numpy as np
+
+    index = SYMPTOM_INDEX
+    incidence, totals = _batch_matrices(index)
+    bits = index["bits"]
+    patients = np.zeros((len(records), len(bits)), dtype=np.float64)
+    for row, (symptoms, lang) in enumerate(records):
+        for s in normalize_symptoms(symptoms, lang or default_lang):
+            col = bits.get(s)
+            if col is not None:
+                patients[row, col] += 1.0
+
+    match_counts = patients @ incidence
+    scores = np.divide(match_counts, totals, out=np.zeros_like(match_counts), where=totals > 0)
+    # summed left to right like score_symptoms (sum() is pairwise and can
+    # differ in the last bit, flipping the rounded probability)
+    total_score = np.cumsum(scores, axis=1)[:, -1:]
+    probs = np.divide(scores, total_score, out=np.zeros_like(scores), where=total_score > 0)
+    return probs * 100
+
 # --------- Routes ----------
 @app.route("/")
 def home():
@@ -300,7 +325,7 @@ def predict_page():
 @app.route("/api/symptoms")
 def get_symptoms():
     lang = request.args.get("lang", "en")
-    return jsonify(SYMPTOMS.get(lang, SYMPTOMS["en"]))
+    return cached_json(lambda: SYMPTOMS.get(lang, SYMPTOMS["en"]))
 
 @app.route("/api/predict", methods=["POST"])
 def api_predict():
@@ -308,7 +333,22 @@ def api_predict():
     selected_symptoms = data.get("symptoms", [])
     lang = data.get("lang", "en")
     selected_symptoms = [s.strip() for s in selected_symptoms if s.strip()]
-    probs, matched = predict_from_symptoms(selected_symptoms, lang=lang)
+    resolved = {}
+    started = time.perf_counter()
+    normalized = normalize_symptoms(selected_symptoms, lang, resolved)
+    METRICS.observe_stage("symptom_normalization", time.perf_counter() - started)
+
+    # Results depend only on the symptom set and language, so the serialized
+    # body is memoized per (sorted symptoms, lang); the per-request "resolved"
+    # mapping is appended to it.
+    key = (tuple(sorted(normalized)), lang)
+    body = PREDICT_CACHE.get(key, lambda: _predict_body(*key))
+    body += b', "resolved": ' + app.json.dumps(resolved).encode("utf-8") + b"}\n"
+    return Response(body, mimetype="application/json")
+
+def _predict_body(symptoms, lang):
+    """The /api/predict JSON body without its closing brace and "resolved" member."""
+    probs, matched = score_symptoms(symptoms)
 
     # Sort by probability descending
     sorted_diseases = sorted(DISEASES, key=lambda d: probs[d], reverse=True)
@@ -323,54 +363,304 @@ def api_predict():
 
     # Highest probability disease
     highest = results[0] if results else {}
-    return jsonify({"results": results, "highest": highest})
-
-@app.route("/download/pdf", methods=["POST"])
-def download_pdf():
+    return app.json.dumps({"results": results, "highest": highest}).encode("utf-8")[:-1]
+
+BATCH_CHUNK_SIZE = 2048
+
+# stands in for an NDJSON line that is not valid JSON
+_INVALID_LINE = object()
+
+def _iter_ndjson(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield _INVALID_LINE
+
+def _batch_source():
+    """Return (records, default_lang) for a batch request, or raise ValueError.
+
+    Accepts either NDJSON (one record per line, read incrementally) or a JSON
+    body {"lang": ..., "records": [...]}. The body's shape is checked here,
+    before any output is streamed.
+    """
+    if request.mimetype == "application/x-ndjson":
+        default_lang = request.args.get("lang", "en")
+        records = _iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValueError('Body must be a JSON object {"records": [...]} or NDJSON')
+        default_lang = data.get("lang", "en")
+        records = data.get("records", [])
+        if not isinstance(records, list):
+            raise ValueError("records must be a list")
+    if not isinstance(default_lang, str):
+        raise ValueError("lang must be a string")
+    return records, default_lang
+
+def _iter_batch_records(records, default_lang):
+    """Yield (id, symptoms, lang, error) for each record of a batch request.
+
+    A record is a list of symptoms or an object {"id": ..., "symptoms": [...],
+    "lang": ...}. Symptoms come back cleaned; records that cannot be scored
+    carry an error message instead.
+    """
+    for i, rec in enumerate(records):
+        rec_id, symptoms, lang = i, rec, default_lang
+        if isinstance(rec, dict):
+            rec_id, symptoms, lang = rec.get("id", i), rec.get("symptoms", []), rec.get("lang", default_lang)
+        if rec is _INVALID_LINE:
+            yield rec_id, None, lang, "invalid JSON"
+        elif not isinstance(symptoms, list):
+            yield rec_id, None, lang, "symptoms must be a list"
+        elif not isinstance(lang, str):
+            yield rec_id, None, default_lang, "lang must be a string"
+        else:
+            yield rec_id, [s.strip() for s in symptoms if isinstance(s, str) and s.strip()], lang, None
+
+def _score_batch_chunk(chunk):
+    with METRICS.stage("batch_scoring"):
+        probs = predict_batch([(symptoms or [], lang) for _, symptoms, lang, _ in chunk])
+    out = []
+    for (rec_id, _, _, error), row in zip(chunk, probs.tolist()):
+        if error is not None:
+            out.append(json.dumps({"id": rec_id, "error": error}) + "\n")
+            continue
+        row_probs = {d: round(p, 1) for d, p in zip(DISEASES, row)}
+        best = max(DISEASES, key=lambda d: row_probs[d])
+        out.append(json.dumps({
+            "id": rec_id,
+            "probabilities": row_probs,
+            "highest": {"disease": best, "probability": row_probs[best]},
+        }, ensure_ascii=False) + "\n")
+    return "".join(out)
+
+@app.route("/api/predict/batch", methods=["POST"])
+def api_predict_batch():
+    """Score many patients per request; results stream back as NDJSON."""
+    try:
+        records, default_lang = _batch_source()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        chunk = []
+        for record in _iter_batch_records(records, default_lang):
+            chunk.append(record)
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                yield _score_batch_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield _score_batch_chunk(chunk)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+PDF_RENDERER = pdf_reports.PdfRenderer(
+    max_workers=int(os.environ.get("DISEASE_APP_PDF_WORKERS", "0")) or None,
+)
+
+def _pdf_payload():
     payload = request.json or {}
     results = payload.get("results", [])
     lang = payload.get("lang", "en")
+    if not isinstance(results, list) or not all(
+        isinstance(r, dict) and "disease" in r and "probability" in r for r in results
+    ):
+        return None, lang
+    return results, lang
 
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, height-40, f"Prediction Results ({lang}) - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    y = height - 70
-    c.setFont("Helvetica", 11)
-
-    for r in results:
-        if y < 80:
-            c.showPage()
-            y = height - 50
-            c.setFont("Helvetica", 11)
-        c.drawString(40, y, f"{r['disease']} — {r['probability']}% — Matched: {', '.join(r.get('matched_symptoms', []))}")
-        y -= 16
-        advice = r.get("advice","")
-        for i in range(0, len(advice), 90):
-            c.drawString(60, y, advice[i:i+90])
-            y -= 12
-        y -= 8
-
-    buf.seek(0)
+def _send_pdf(pdf, lang):
     filename = f"prediction_{lang}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    c.save()
-    return send_file(buf, as_attachment=True, download_name=filename, mimetype="application/pdf")
+    return send_file(io.BytesIO(pdf), as_attachment=True, download_name=filename, mimetype="application/pdf")
+
+def _submit_pdf_job(results, lang):
+    try:
+        job_id = PDF_RENDERER.submit(results, lang)
+    except pdf_reports.RenderUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({
+        "job_id": job_id,
+        "status": PDF_RENDERER.status(job_id),
+        "status_url": url_for("pdf_job_status", job_id=job_id),
+        "download_url": url_for("pdf_job_download", job_id=job_id, lang=lang),
+    }), 202
+
+@app.route("/download/pdf", methods=["POST"])
+def download_pdf():
+    """The report PDF; large uncached reports are queued and answered like /api/pdf/jobs."""
+    results, lang = _pdf_payload()
+    if results is None:
+        return jsonify({"error": "results must be a list of prediction results"}), 400
+    with METRICS.stage("pdf_render"):
+        pdf = PDF_RENDERER.render(results, lang)
+    if pdf is None:
+        return _submit_pdf_job(results, lang)
+    return _send_pdf(pdf, lang)
+
+@app.route("/api/pdf/jobs", methods=["POST"])
+def submit_pdf_job():
+    """Queue a PDF report; poll the status URL, then fetch the download URL."""
+    results, lang = _pdf_payload()
+    if results is None:
+        return jsonify({"error": "results must be a list of prediction results"}), 400
+    return _submit_pdf_job(results, lang)
+
+@app.route("/api/pdf/jobs/<job_id>")
+def pdf_job_status(job_id):
+    status = PDF_RENDERER.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"job_id": job_id, "status": status})
+
+@app.route("/api/pdf/jobs/<job_id>/download")
+def pdf_job_download(job_id):
+    pdf = PDF_RENDERER.result(job_id)
+    if pdf is None:
+        status = PDF_RENDERER.status(job_id)
+        if status is None:
+            return jsonify({"error": "Unknown job"}), 404
+        return jsonify({"job_id": job_id, "status": status}), 409
+    return _send_pdf(pdf, request.args.get("lang", "en"))
 
 @app.route("/stats")
 def stats_page():
     return render_template("stats.html", diseases=DISEASES)
 
+def _split_arg(name):
+    value = request.args.get(name, "")
+    return [v.strip() for v in value.split(",") if v.strip()]
+
 @app.route("/api/stats/data")
 def api_stats():
-    return jsonify({"statewise": STATEWISE_YEARLY})
+    """Statewise yearly counts.
+
+    Without a disease this returns the full nested table. With ?disease= it
+    returns one slice, narrowed by states=a,b, year_from/year_to (or year)
+    and optionally aggregated over the years with agg=sum|mean|growth.
+    """
+    return cached_json(_stats_payload)
+
+def _stats_payload():
+    disease = request.args.get("disease")
+    if not disease:
+        with METRICS.stage("stats_full"):
+            return {"statewise": get_cases().to_nested()}
+
+    year = request.args.get("year")
+    try:
+        with METRICS.stage("stats_query"):
+            return get_cases().query(
+                disease,
+                states=_split_arg("states"),
+                year_from=request.args.get("year_from", year),
+                year_to=request.args.get("year_to", year),
+                agg=request.args.get("agg"),
+            )
+    except KeyError as e:
+        return {"error": f"Unknown disease, state or year: {e.args[0]}"}, 400
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+@app.route("/api/stats/totals")
+def api_stats_totals():
+    """Precomputed per-disease and per-disease-per-year totals."""
+    def build():
+        cases = get_cases()
+        return {
+            "years": cases.years,
+            "diseases": {
+                d: {"total": int(cases.disease_totals[i]),
+                    "by_year": dict(zip(cases.years, cases.year_totals[i].tolist()))}
+                for i, d in enumerate(cases.diseases)
+            },
+        }
+    return cached_json(build)
+
+def get_forecaster():
+    global FORECASTER
+    if FORECASTER is None:
+        import forecast
+        FORECASTER = forecast.Forecaster()
+    return FORECASTER
+
+@app.route("/api/stats/forecast")
+def api_stats_forecast():
+    """Projected case counts for the years after the last one on record.
+
+    ?model=linear|exp|holt (default linear), horizon=1..10 years (default 1),
+    and optionally disease= and states=a,b. Fitted parameters are cached and
+    refreshed only for the series that changed.
+    """
+    def build():
+        try:
+            horizon = int(request.args.get("horizon", 1))
+        except ValueError:
+            return {"error": "horizon must be a whole number"}, 400
+        try:
+            with METRICS.stage("forecast"):
+                return get_forecaster().forecast(
+                    get_cases(),
+                    request.args.get("model", "linear"),
+                    disease=request.args.get("disease"),
+                    states=_split_arg("states"),
+                    horizon=horizon,
+                )
+        except KeyError as e:
+            return {"error": f"Unknown disease or state: {e.args[0]}"}, 400
+        except ValueError as e:
+            return {"error": str(e)}, 400
+    return cached_json(build)
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+@app.route("/api/stats/export.<fmt>")
+def api_stats_export(fmt):
+    """Download statewise yearly data as CSV or XLSX.
+
+    Takes the /api/stats/data filters (disease may list several, comma
+    separated; all diseases if omitted). Files for the current data version
+    are reused from the on-disk export cache.
+    """
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"error": "Format must be csv or xlsx"}), 404
+    diseases, states = _split_arg("disease"), _split_arg("states")
+    year = request.args.get("year")
+    year_from = request.args.get("year_from", year)
+    year_to = request.args.get("year_to", year)
+    try:
+        rows = export.iter_rows(get_cases(), diseases, states, year_from, year_to)
+    except KeyError as e:
+        return jsonify({"error": f"Unknown disease, state or year: {e.args[0]}"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key = (fmt, diseases, states, year_from, year_to, DATA_VERSION)
+    path = EXPORT_CACHE.path_for(key, fmt)
+    download_name = f"cases_v{DATA_VERSION}.{fmt}"
+    mimetype = EXPORT_MIMETYPES[fmt]
+    if EXPORT_CACHE.get(path):
+        return send_file(path, as_attachment=True, download_name=download_name, mimetype=mimetype)
+
+    if fmt == "xlsx":
+        EXPORT_CACHE.write(path, lambda f: export.write_xlsx(rows, f))
+        return send_file(path, as_attachment=True, download_name=download_name, mimetype=mimetype)
+
+    resp = Response(EXPORT_CACHE.tee(export.iter_csv(rows), path), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f"attachment; filename={download_name}"
+    return resp
 
 # --------------------- UPDATE DATA PAGE ---------------------
 
 @app.route("/update", methods=["GET"])
 def update_page():
     """Render a page to update disease yearly data"""
-    return render_template("update.html", diseases=DISEASES, states=list(next(iter(STATEWISE_YEARLY.values())).keys()), years=[str(y) for y in range(2020,2026)])
+    return render_template("update.html", diseases=DISEASES, states=get_cases().states, years=get_cases().years)
 
 @app.route("/update_data", methods=["POST"])
 def update_data_post():
@@ -382,17 +672,40 @@ def update_data_post():
 
     try:
         cases = int(cases)
-        if disease in STATEWISE_YEARLY and state in STATEWISE_YEARLY[disease] and year in STATEWISE_YEARLY[disease][state]:
-            STATEWISE_YEARLY[disease][state][year] = cases
+    except (TypeError, ValueError):
+        message = "Cases must be a number ❌"
+    else:
+        if get_cases().has(disease, state, year):
+            save_cases([(disease, state, year, cases)])
             message = f"Updated {disease} cases in {state} for {year} to {cases} ✅"
         else:
             message = "Invalid disease/state/year selection ❌"
-    except:
-        message = "Cases must be a number ❌"
 
-    return render_template("update.html", diseases=DISEASES, states=list(next(iter(STATEWISE_YEARLY.values())).keys()), years=[str(y) for y in range(2020,2026)], message=message)
+    return render_template("update.html", diseases=DISEASES, states=get_cases().states, years=get_cases().years, message=message)
 
+@app.route("/update/bulk", methods=["POST"])
+def update_bulk():
+    """Import a CSV/XLSX file of disease,state,year,cases rows in one batch."""
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"error": "Attach a CSV or XLSX file as 'file'"}), 400
+    try:
+        report = bulk_import.import_cases(upload.stream, upload.filename, get_cases(), save_cases)
+    except bulk_import.BulkImportError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(report)
+
+@app.cli.command("import-cases")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_cases_command(path):
+    """Import a CSV/XLSX file of disease,state,year,cases rows."""
+    with open(path, "rb") as f:
+        try:
+            report = bulk_import.import_cases(f, path, get_cases(), save_cases)
+        except bulk_import.BulkImportError as e:
+            raise click.ClickException(str(e))
+    click.echo(f"{report['accepted']}/{report['rows']} rows imported in {report['seconds']}s "
+               f"({report['rows_per_second']} rows/s), {report['rejected']} rejected")
+    for r in report["rejected_rows"]:
+        click.echo(f"  line {r['line']}: {r['reason']}")
 
-# --------- Run ----------
-if __name__ == "__main__":
-    app.run(debug=True, port=5000)
@@ -0,0 +1,76 @@
+"""Run the benchmark suite and compare against the stored baseline.
+
+    python -m benchmarks                      # all suites, fail on >50% regressions
+    python -m benchmarks predict routes       # selected suites
+    python -m benchmarks startup              # cold start against its time budget
+    python -m benchmarks --save-baseline      # record current timings as the baseline
+
+Runs offline against a throwaway case database. Every suite runs --runs
+times (after its own calibration) and each figure is the median across runs.
+Exits 1 when any benchmark's best time is slower than its baseline by more
+than --threshold, or when startup exceeds the budgets in bench_startup.BUDGETS.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+SUITES = ("startup", "predict", "routes", "scaling")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help=f"one or more of: {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--baseline", default=None, help="baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="allowed slowdown before failing, as a fraction (default 0.5)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route for latency runs")
+    parser.add_argument("--runs", type=int, default=3, help="runs per suite; figures are medians across runs")
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.suites if s not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+    args.suites = args.suites or list(SUITES)
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DISEASE_APP_DB", os.path.join(tmp.name, "bench.db"))
+
+    import app
+    from benchmarks import bench_predict, bench_routes, bench_scaling, bench_startup, harness
+
+    runners = {
+        "startup": bench_startup.run,
+        "predict": bench_predict.run,
+        "routes": lambda a: bench_routes.run(a, requests=args.requests),
+        "scaling": bench_scaling.run,
+    }
+    print(f"{'benchmark':<48} {'median':>10} {'p95':>10} {'p99':>10} {'throughput':>14}")
+    results = []
+    for suite in args.suites:
+        runs = [[harness.calibrate(suite)] + runners[suite](app) for _ in range(max(1, args.runs))]
+        for result in harness.median_of_runs(runs):
+            print(result, flush=True)
+            results.append(result)
+
+    over = bench_startup.over_budget(results)
+    for name, budget, best in over:
+        print(f"OVER BUDGET {name}: {best * 1e3:.1f}ms > {budget * 1e3:.0f}ms", file=sys.stderr)
+
+    baseline_path = args.baseline or harness.BASELINE_PATH
+    if args.save_baseline:
+        harness.save_baseline(results, baseline_path)
+        print(f"baseline written to {baseline_path}")
+        return 1 if over else 0
+
+    threshold = harness.DEFAULT_THRESHOLD if args.threshold is None else args.threshold
+    regressions = harness.compare(results, harness.load_baseline(baseline_path), threshold)
+    for name, expected, current in regressions:
+        print(f"REGRESSION {name}: {expected * 1e6:.1f}us -> {current * 1e6:.1f}us "
+              f"(+{(current / expected - 1) * 100:.0f}%)", file=sys.stderr)
+    return 1 if regressions or over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""Microbenchmarks of the symptom scoring functions."""
+import random
+
+from benchmarks.harness import bench
+
+SYMPTOM_COUNTS = (1, 3, 8, 20)
+TYPOS = ["feaver", "sore-throat", "headach", "runy nose", "loose motion", "stomache ache", "xyzzy"]
+
+
+def run(app):
+    rng = random.Random(0)
+    results = []
+    for lang in ("en", "hi", "mr"):
+        vocab = app.SYMPTOMS[lang]
+        for n in SYMPTOM_COUNTS:
+            selected = rng.sample(vocab, min(n, len(vocab)))
+            results.append(bench(
+                f"predict_from_symptoms[{lang},{n}]",
+                lambda s=selected, l=lang: app.predict_from_symptoms(s, l),
+            ))
+
+    records = [(rng.sample(app.SYMPTOMS[lang], 4), lang)
+               for lang in rng.choices(("en", "hi", "mr"), k=1000)]
+    results.append(bench("predict_batch[1000 patients]", lambda: app.predict_batch(records), repeat=5))
+
+    matcher = app.SYMPTOM_INDEX["matcher"]
+    keys = [app.symptom_match.normalize_text(t) for t in TYPOS]
+    results.append(bench(f"fuzzy match[{len(keys)} typos, uncached]",
+                         lambda: [matcher.match(k) for k in keys]))
+    return results
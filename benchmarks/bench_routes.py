@@ -0,0 +1,47 @@
+"""Per-route throughput and latency percentiles through the Flask test client."""
+from benchmarks.harness import bench, latency
+
+PREDICT_BODY = {"symptoms": ["fever", "cough", "headache", "fatigue"], "lang": "en"}
+
+
+def run(app, requests=500):
+    client = app.app.test_client()
+    results = []
+
+    def get(url):
+        return lambda: client.get(url)
+
+    def post(url, body):
+        return lambda: client.post(url, json=body)
+
+    def post_uncached(url, body):
+        # every call after the first would be a prediction cache hit
+        def call():
+            app.PREDICT_CACHE.clear()
+            return client.post(url, json=body)
+        return call
+
+    predict = client.post("/api/predict", json=PREDICT_BODY).get_json()["results"]
+    routes = [
+        ("POST /api/predict", post_uncached("/api/predict", PREDICT_BODY)),
+        ("GET /api/symptoms", get("/api/symptoms?lang=hi")),
+        ("GET /api/stats/data (full)", get("/api/stats/data")),
+        ("GET /api/stats/data (slice)", get("/api/stats/data?disease=Malaria&year=2023")),
+        ("GET /api/stats/data (agg)", get("/api/stats/data?disease=Dengue&agg=growth")),
+        ("GET /api/stats/forecast", get("/api/stats/forecast?model=holt")),
+        ("POST /download/pdf (cached)", post("/download/pdf", {"results": predict, "lang": "en"})),
+    ]
+    for name, call in routes:
+        results.append(latency(name, call, requests=requests))
+
+    # uncached work behind the cached routes
+    symptoms = tuple(sorted(PREDICT_BODY["symptoms"]))
+    results.append(bench("predict body (uncached)", lambda: app._predict_body(symptoms, "en")))
+    results.append(bench("stats full payload (uncached)", lambda: app.get_cases().to_nested()))
+    results.append(bench("stats slice payload (uncached)",
+                         lambda: app.get_cases().query("Malaria", year_from="2023", year_to="2023")))
+    results.append(bench("forecast all series (fitted)",
+                         lambda: app.get_forecaster().forecast(app.get_cases(), "holt")))
+    results.append(bench("render_pdf[10 results]",
+                         lambda: app.pdf_reports.render_pdf(predict, "en", "bench"), repeat=5))
+    return results
@@ -0,0 +1,39 @@
+"""Scaling runs on synthetic tables grown along one axis at a time (and all axes at 10x)."""
+import random
+
+from benchmarks import synthetic
+from benchmarks.harness import bench
+
+SCENARIOS = [
+    ("all x10", 10, ("diseases", "symptoms", "states", "years")),
+    ("diseases x100", 100, ("diseases", "symptoms")),
+    ("states x100", 100, ("states",)),
+    ("years x100", 100, ("years",)),
+]
+
+
+def run(app):
+    results = []
+    client = app.app.test_client()
+    for label, factor, axes in SCENARIOS:
+        tables = synthetic.scaled(factor, axes)
+        with synthetic.installed(app, tables):
+            rng = random.Random(0)
+            selected = rng.sample(app.SYMPTOMS["en"], 5)
+            translated = rng.sample(app.SYMPTOMS["hi"], 5)
+            disease = app.DISEASES[0]
+            results.append(bench(f"{label}: predict_from_symptoms[en,5]",
+                                 lambda: app.predict_from_symptoms(selected, "en")))
+            results.append(bench(f"{label}: predict_from_symptoms[hi,5]",
+                                 lambda: app.predict_from_symptoms(translated, "hi")))
+            typos = [s[:-2] + s[-1] + "x" for s in selected]
+            results.append(bench(f"{label}: fuzzy match[5 typos, uncached]",
+                                 lambda: [app.SYMPTOM_INDEX["matcher"].match(t) for t in typos]))
+            results.append(bench(f"{label}: POST /api/predict",
+                                 lambda: (app.PREDICT_CACHE.clear(),  # measure scoring, not cache hits
+                                          client.post("/api/predict", json={"symptoms": selected}))))
+            results.append(bench(f"{label}: stats slice (uncached)",
+                                 lambda: app.get_cases().query(disease, agg="sum")))
+            results.append(bench(f"{label}: stats full payload (uncached)",
+                                 lambda: app.get_cases().to_nested(), repeat=3))
+    return results
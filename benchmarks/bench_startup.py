@@ -0,0 +1,45 @@
+"""Cold-start cost: importing the app and serving its first request, in fresh interpreters."""
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import Result
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Hard limits in seconds (best of the runs), enforced on every run.
+BUDGETS = {
+    "startup: import app": 0.5,
+    "startup: first request": 0.1,
+}
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.app.test_client().post("/api/predict", json={"symptoms": ["fever", "cough"]})
+t2 = time.perf_counter()
+print(json.dumps([t1 - t0, t2 - t1]))
+"""
+
+
+def run(app=None, runs=7):
+    imports, first = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=os.environ.copy(),
+                             capture_output=True, text=True, check=True)
+        t_import, t_first = json.loads(out.stdout.strip().splitlines()[-1])
+        imports.append(t_import)
+        first.append(t_first)
+    return [
+        Result("startup: import app", imports),
+        Result("startup: first request", first),
+    ]
+
+
+def over_budget(results):
+    """Return [(name, budget, best)] for results above their budget."""
+    return [(r.name, BUDGETS[r.name], r.best) for r in results
+            if r.name in BUDGETS and r.best > BUDGETS[r.name]]
@@ -0,0 +1,144 @@
+import json
+import os
+import statistics
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.5
+
+
+class Result:
+    """Timings of one benchmark, in seconds per operation."""
+
+    def __init__(self, name, samples, ops_per_sample=1):
+        self.name = name
+        per_op = sorted(s / ops_per_sample for s in samples)
+        self.samples = per_op
+        self.best = per_op[0] if per_op else 0.0
+        self.median = statistics.median(per_op)
+        self.p95 = _percentile(per_op, 95)
+        self.p99 = _percentile(per_op, 99)
+
+    def as_dict(self):
+        return {"best": self.best, "median": self.median, "p95": self.p95, "p99": self.p99,
+                "n": len(self.samples)}
+
+    def __str__(self):
+        return (f"{self.name:<48} {_fmt(self.median):>10} {_fmt(self.p95):>10} {_fmt(self.p99):>10}"
+                f" {1 / self.median if self.median else float('inf'):>12,.0f}/s")
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}us"
+
+
+def bench(name, fn, number=None, repeat=7, min_time=0.1):
+    """Time fn(); calls are batched `number` at a time (auto-sized to min_time) over `repeat` samples."""
+    fn()  # warm-up
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= min_time or number >= 1_000_000:
+                break
+            number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append(time.perf_counter() - start)
+    return Result(name, samples, number)
+
+
+def latency(name, fn, requests=500):
+    """Time each of `requests` calls separately, for latency percentiles."""
+    fn()
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return Result(name, samples)
+
+
+def _calibration_workload():
+    d = {}
+    for i in range(2000):
+        d[str(i)] = [i, i * 2]
+    return sorted(d.items(), key=lambda kv: kv[1][1])
+
+
+def calibrate(suite=None):
+    """Best time of a fixed pure-Python workload, used to normalize for machine speed."""
+    return bench(f"_calibration ({suite})" if suite else "_calibration", _calibration_workload)
+
+
+def median_of_runs(runs):
+    """Combine repeated runs of a suite (lists of Results, same order): each statistic is its median."""
+    combined = []
+    for results in zip(*runs):
+        merged = Result(results[0].name, [s for r in results for s in r.samples])
+        merged.best = statistics.median(r.best for r in results)
+        merged.median = statistics.median(r.median for r in results)
+        merged.p95 = statistics.median(r.p95 for r in results)
+        merged.p99 = statistics.median(r.p99 for r in results)
+        combined.append(merged)
+    return combined
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({r.name: r.as_dict() for r in results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return [(name, baseline, current)] for results slower than baseline by more than threshold.
+
+    Compares the best sample (with repeated runs, the median of each run's
+    best): on a shared machine noise only ever adds time, so it is the most
+    repeatable figure. Each suite starts with its own calibration result;
+    when the machine measures slower than at baseline time, that suite's
+    baseline times are scaled up by the ratio. They are never scaled down:
+    the pure-Python calibration does not track NumPy, SQLite or subprocess
+    timings, and a fast calibration reading must not turn noise into failures.
+    """
+    legacy = baseline.get("_calibration")
+    scale = 1.0
+    regressions = []
+    for r in results:
+        if r.name.startswith("_calibration"):
+            base_cal = baseline.get(r.name) or legacy
+            scale = max(1.0, r.best / base_cal["best"]) if base_cal else 1.0
+            continue
+        base = baseline.get(r.name)
+        if not base:
+            continue
+        expected = base["best"] * scale
+        if r.best > expected * (1 + threshold):
+            regressions.append((r.name, expected, r.best))
+    return regressions
@@ -0,0 +1,52 @@
+"""Synthetic disease/symptom/case tables for scaling benchmarks."""
+import contextlib
+import random
+
+import numpy as np
+
+from cases import CaseCube
+
+LANGS = ("en", "hi", "mr")
+
+
+def make_tables(diseases=10, symptoms=20, states=13, years=6, symptoms_per_disease=5, seed=0):
+    """Return (DISEASES, SYMPTOMS, DISEASE_SYMPTOMS, ADVICE, CASES) of the requested size."""
+    rng = random.Random(seed)
+    disease_names = [f"Disease {i}" for i in range(diseases)]
+    vocab = {lang: [f"{lang} symptom {i}" for i in range(symptoms)] for lang in LANGS}
+    vocab["en"] = [f"symptom {i}" for i in range(symptoms)]
+    disease_symptoms = {
+        d: rng.sample(vocab["en"], min(symptoms_per_disease, symptoms)) for d in disease_names
+    }
+    advice = {d: {lang: f"Advice for {d} ({lang})." for lang in LANGS} for d in disease_names}
+
+    state_names = [f"State {i}" for i in range(states)]
+    year_names = [str(2020 + i) for i in range(years)]
+    np_rng = np.random.default_rng(seed)
+    counts = np_rng.integers(0, 1000, size=(diseases, states, years), dtype=np.int64)
+    present = np.ones_like(counts, dtype=bool)
+    cube = CaseCube(disease_names, state_names, year_names, counts, present)
+    return disease_names, vocab, disease_symptoms, advice, cube
+
+
+def scaled(factor=1, axes=("diseases", "symptoms", "states", "years"), seed=0):
+    """Tables with the chosen axes multiplied by factor relative to the shipped data."""
+    base = {"diseases": 10, "symptoms": 20, "states": 13, "years": 6}
+    size = {k: v * factor if k in axes else v for k, v in base.items()}
+    return make_tables(seed=seed, **size)
+
+
+@contextlib.contextmanager
+def installed(app_module, tables):
+    """Temporarily swap the app's tables for synthetic ones, rebuilding derived state."""
+    names = ("DISEASES", "SYMPTOMS", "DISEASE_SYMPTOMS", "ADVICE", "CASES")
+    saved = {n: getattr(app_module, n) for n in names}
+    try:
+        for n, value in zip(names, tables):
+            setattr(app_module, n, value)
+        app_module.rebuild_symptom_index()
+        yield
+    finally:
+        for n, value in saved.items():
+            setattr(app_module, n, value)
+        app_module.rebuild_symptom_index()
@@ -0,0 +1,138 @@
+import csv
+import io
+import time
+
+COLUMNS = ("disease", "state", "year", "cases")
+MAX_REPORTED_REJECTS = 100
+
+
+class BulkImportError(ValueError):
+    """The uploaded file cannot be read as a case table at all."""
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        yield from reader
+    except UnicodeDecodeError as e:
+        raise BulkImportError("CSV files must be UTF-8 encoded") from e
+    except csv.Error as e:  # e.g. a field over csv.field_size_limit()
+        raise BulkImportError(f"Cannot read CSV line {reader.line_num}: {e}") from e
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(fileobj):
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:  # openpyxl raises zip/xml errors for bad files
+        raise BulkImportError(f"Cannot read workbook: {e}") from e
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    except Exception as e:  # sheets are parsed lazily, so broken XML can surface mid-file
+        raise BulkImportError(f"Cannot read workbook: {e}") from e
+    finally:
+        wb.close()
+
+
+def iter_table(fileobj, filename):
+    """Stream (line number, {column: value}) from a CSV or XLSX upload.
+
+    The first row must be a header naming the disease, state, year and cases
+    columns (any order, case-insensitive; other columns are ignored).
+    """
+    name = (filename or "").lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        rows = _iter_xlsx(fileobj)
+    elif name.endswith(".csv"):
+        rows = _iter_csv(fileobj)
+    else:
+        raise BulkImportError("Upload a .csv or .xlsx file")
+
+    header = next(rows, None)
+    if header is None:
+        raise BulkImportError("The file is empty")
+    header = [str(h).strip().lower() if h is not None else "" for h in header]
+    missing = [c for c in COLUMNS if c not in header]
+    if missing:
+        raise BulkImportError(f"Missing column(s): {', '.join(missing)}")
+    positions = [header.index(c) for c in COLUMNS]
+
+    for line_no, row in enumerate(rows, start=2):
+        if not row or all(v is None or str(v).strip() == "" for v in row):
+            continue
+        row = list(row) + [None] * (len(header) - len(row))
+        yield line_no, {c: row[i] for c, i in zip(COLUMNS, positions)}
+
+
+def _as_int(value):
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError
+        return int(value)
+    return int(str(value).strip())
+
+
+def validate_row(row, cube):
+    """Return ((disease, state, year, cases), None) or (None, reason)."""
+    disease = str(row["disease"] or "").strip()
+    state = str(row["state"] or "").strip()
+    if disease not in cube.disease_idx:
+        return None, f"Unknown disease {disease!r}"
+    if state not in cube.state_idx:
+        return None, f"Unknown state {state!r}"
+    try:
+        year = str(_as_int(row["year"]))
+    except (TypeError, ValueError):
+        return None, f"Invalid year {row['year']!r}"
+    if year not in cube.year_idx:
+        return None, f"Unknown year {year}"
+    # same rule as the update form: only cells that already hold data
+    if not cube.has(disease, state, year):
+        return None, f"No {disease} record for {state} in {year}"
+    try:
+        cases = _as_int(row["cases"])
+    except (TypeError, ValueError):
+        return None, f"Cases must be a whole number, got {row['cases']!r}"
+    if cases < 0:
+        return None, "Cases cannot be negative"
+    return (disease, state, year, cases), None
+
+
+def import_cases(fileobj, filename, cube, save):
+    """Validate every row of an upload and apply the valid ones with one save(rows) call.
+
+    Later rows for the same disease/state/year replace earlier ones, so the
+    rows held until the commit never exceed the size of the cube.
+    """
+    started = time.perf_counter()
+    accepted = {}
+    rejected = []
+    rejected_count = 0
+    total = 0
+
+    for line_no, row in iter_table(fileobj, filename):
+        total += 1
+        valid, reason = validate_row(row, cube)
+        if valid is None:
+            rejected_count += 1
+            if len(rejected) < MAX_REPORTED_REJECTS:
+                rejected.append({"line": line_no, "reason": reason})
+            continue
+        accepted[valid[:3]] = valid
+
+    version = save(list(accepted.values())) if accepted else None
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": total,
+        "accepted": total - rejected_count,
+        "cells_updated": len(accepted),
+        "rejected": rejected_count,
+        "rejected_rows": rejected,
+        "version": version,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed) if elapsed > 0 else None,
+    }
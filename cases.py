@@ -0,0 +1,152 @@
+import numpy as np
+
+AGGREGATIONS = ("sum", "mean", "growth")
+
+
+class CaseCube:
+    """Case counts stored as a dense disease x state x year array.
+
+    Cells that have no data are kept at 0 and flagged False in `present`.
+    Per-disease and per-(disease, year) totals are kept up to date on every
+    write so summary queries never rescan the cube.
+    """
+
+    def __init__(self, diseases, states, years, counts, present):
+        self.diseases = list(diseases)
+        self.states = list(states)
+        self.years = list(years)
+        self.disease_idx = {d: i for i, d in enumerate(self.diseases)}
+        self.state_idx = {s: i for i, s in enumerate(self.states)}
+        self.year_idx = {y: i for i, y in enumerate(self.years)}
+        self.counts = counts
+        self.present = present
+        self.recompute_totals()
+
+    @classmethod
+    def from_nested(cls, nested, diseases=None):
+        """Build a cube from {disease: {state: {year: cases}}}."""
+        diseases = list(diseases) if diseases is not None else list(nested)
+        states, years = [], set()
+        seen = set()
+        for by_state in nested.values():
+            for state, by_year in by_state.items():
+                if state not in seen:
+                    seen.add(state)
+                    states.append(state)
+                years.update(by_year)
+        years = sorted(years, key=int)
+
+        shape = (len(diseases), len(states), len(years))
+        cube = cls(diseases, states, years,
+                   np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=bool))
+        for disease, by_state in nested.items():
+            if disease not in cube.disease_idx:
+                continue
+            for state, by_year in by_state.items():
+                for year, cases in by_year.items():
+                    cube.set(disease, state, year, cases)
+        return cube
+
+    def recompute_totals(self):
+        self.year_totals = self.counts.sum(axis=1)
+        self.disease_totals = self.year_totals.sum(axis=1)
+
+    def has(self, disease, state, year):
+        try:
+            return bool(self.present[self._cell(disease, state, year)])
+        except KeyError:
+            return False
+
+    def has_cell(self, disease, state, year):
+        """True if the cube has a slot for this cell, whether or not it holds data."""
+        return disease in self.disease_idx and state in self.state_idx and str(year) in self.year_idx
+
+    def get(self, disease, state, year):
+        cell = self._cell(disease, state, year)
+        return int(self.counts[cell]) if self.present[cell] else None
+
+    def set(self, disease, state, year, cases):
+        cell = self._cell(disease, state, year)
+        d, _, y = cell
+        delta = int(cases) - int(self.counts[cell])
+        self.counts[cell] = cases
+        self.present[cell] = True
+        self.year_totals[d, y] += delta
+        self.disease_totals[d] += delta
+
+    def _cell(self, disease, state, year):
+        return self.disease_idx[disease], self.state_idx[state], self.year_idx[str(year)]
+
+    def to_nested(self):
+        """Inverse of from_nested; missing cells are left out."""
+        out = {}
+        for d, disease in enumerate(self.diseases):
+            by_state = {}
+            for s, state in enumerate(self.states):
+                row = self.counts[d, s].tolist()
+                mask = self.present[d, s].tolist()
+                if any(mask):
+                    by_state[state] = {y: v for y, v, ok in zip(self.years, row, mask) if ok}
+            out[disease] = by_state
+        return out
+
+    def year_range(self, year_from=None, year_to=None):
+        """Return the slice of year positions between year_from and year_to (inclusive)."""
+        lo = 0 if year_from is None else self.year_idx[str(year_from)]
+        hi = len(self.years) - 1 if year_to is None else self.year_idx[str(year_to)]
+        if lo > hi:
+            raise ValueError("year_from is after year_to")
+        return slice(lo, hi + 1)
+
+    def query(self, disease, states=None, year_from=None, year_to=None, agg=None):
+        """Slice one disease by states and a year range, optionally aggregating over years.
+
+        Raises KeyError for unknown names and ValueError for an unknown
+        aggregation or a reversed year range.
+        """
+        if agg is not None and agg not in AGGREGATIONS:
+            raise ValueError(f"agg must be one of {', '.join(AGGREGATIONS)}")
+        d = self.disease_idx[disease]
+        ys = self.year_range(year_from, year_to)
+        if states:
+            s_idx = [self.state_idx[s] for s in states]
+        else:
+            # only states that report data for this disease in the range
+            s_idx = np.flatnonzero(self.present[d, :, ys].any(axis=1)).tolist()
+
+        counts = self.counts[d][np.ix_(s_idx, range(ys.start, ys.stop))]
+        present = self.present[d][np.ix_(s_idx, range(ys.start, ys.stop))]
+        years = self.years[ys]
+        result = {
+            "disease": disease,
+            "states": [self.states[i] for i in s_idx],
+            "years": years,
+            "totals": {
+                "disease": int(self.disease_totals[d]),
+                "by_year": dict(zip(years, self.year_totals[d, ys].tolist())),
+            },
+        }
+
+        if agg is None:
+            result["counts"] = [
+                [v if ok else None for v, ok in zip(row, mask)]
+                for row, mask in zip(counts.tolist(), present.tolist())
+            ]
+            return result
+
+        result["agg"] = agg
+        if agg == "sum":
+            values = counts.sum(axis=1).tolist()
+        elif agg == "mean":
+            n = present.sum(axis=1)
+            sums = counts.sum(axis=1)
+            values = [round(float(t) / c, 2) if c else None for t, c in zip(sums.tolist(), n.tolist())]
+        else:
+            first, last = counts[:, 0].tolist(), counts[:, -1].tolist()
+            ok = (present[:, 0] & present[:, -1]).tolist()
+            values = [
+                round((b - a) / a * 100, 1) if good and a else None
+                for a, b, good in zip(first, last, ok)
+            ]
+        result["values"] = values
+        return result
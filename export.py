@@ -0,0 +1,125 @@
+import csv
+import hashlib
+import io
+import os
+import tempfile
+
+HEADER = ("disease", "state", "year", "cases")
+CSV_FLUSH_ROWS = 1000
+
+
+def iter_rows(cube, diseases=None, states=None, year_from=None, year_to=None):
+    """Return an iterator of (disease, state, year, cases) for every cell with data.
+
+    Rows use the same columns bulk_import reads, so an export can be edited
+    and uploaded again. Names are checked up front: raises KeyError for
+    unknown names and ValueError for a reversed year range.
+    """
+    d_idx = [cube.disease_idx[d] for d in diseases] if diseases else range(len(cube.diseases))
+    s_idx = [cube.state_idx[s] for s in states] if states else list(range(len(cube.states)))
+    ys = cube.year_range(year_from, year_to)
+    y_idx = list(range(ys.start, ys.stop))
+    return _generate_rows(cube, d_idx, s_idx, y_idx)
+
+
+def _generate_rows(cube, d_idx, s_idx, y_idx):
+    import numpy as np
+
+    for d in d_idx:
+        counts = cube.counts[d][np.ix_(s_idx, y_idx)].tolist()
+        present = cube.present[d][np.ix_(s_idx, y_idx)].tolist()
+        disease = cube.diseases[d]
+        for s, row, mask in zip(s_idx, counts, present):
+            state = cube.states[s]
+            for y, value, ok in zip(y_idx, row, mask):
+                if ok:
+                    yield disease, state, cube.years[y], value
+
+
+def iter_csv(rows):
+    """Encode rows as CSV, yielding UTF-8 chunks of CSV_FLUSH_ROWS rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HEADER)
+    for n, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if n % CSV_FLUSH_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(rows, fileobj):
+    """Write rows to an XLSX file using openpyxl's write-only (streaming) mode."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("cases")
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    wb.save(fileobj)
+
+
+class ExportCache:
+    """Small on-disk cache of finished export files, keyed by (format, filters, data version)."""
+
+    def __init__(self, directory, max_files=32):
+        self.directory = directory
+        self.max_files = max_files
+
+    def path_for(self, key, ext):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{ext}")
+
+    def get(self, path):
+        if os.path.exists(path):
+            os.utime(path)  # keep recently used files from being pruned
+            return path
+        return None
+
+    def tee(self, chunks, path):
+        """Yield chunks while writing them to path; the file appears only once complete."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        done = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp, path)
+            done = True
+            self.prune()
+        finally:
+            if not done and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def write(self, path, writer):
+        """Create path by calling writer(fileobj) on a temporary file, then publish it."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.prune()
+        return path
+
+    def prune(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if not e.name.endswith(".part")]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(e.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,165 @@
+import threading
+
+import numpy as np
+
+MODELS = ("linear", "exp", "holt")
+MAX_HORIZON = 10
+
+# Holt smoothing parameters are picked per series from this grid by
+# one-step-ahead squared error.
+HOLT_GRID = np.linspace(0.1, 0.9, 5)
+
+
+def fit_trend(y, mask, log=False):
+    """Least-squares line through the present points of every row of y (n x T).
+
+    Returns (intercept, slope) arrays; with log=True the line is fitted to
+    log1p(y), i.e. an exponential trend. Rows without data get NaN.
+    """
+    if log:
+        y = np.log1p(np.maximum(y, 0))
+    w = mask.astype(np.float64)
+    t = np.arange(y.shape[1], dtype=np.float64)
+    sw = w.sum(axis=1)
+    st = w @ t
+    stt = w @ (t * t)
+    sy = (w * y).sum(axis=1)
+    sty = (w * y) @ t
+    denom = sw * stt - st * st
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(denom > 0, (sw * sty - st * sy) / denom, 0.0)
+        intercept = (sy - slope * st) / sw
+    return intercept, slope
+
+
+def _holt_run(y, mask, alpha, beta):
+    """Run Holt's recursion for each row; returns (level, trend, sse) after the last point."""
+    first = np.argmax(mask, axis=1)
+    rows = np.arange(y.shape[0])
+    level = y[rows, first].astype(np.float64)
+    trend = np.zeros(y.shape[0])
+    sse = np.zeros(y.shape[0])
+    for t in range(1, y.shape[1]):
+        observed = mask[:, t] & (t > first)
+        predicted = level + trend
+        err = np.where(observed, y[:, t] - predicted, 0.0)
+        sse += err * err
+        new_level = np.where(observed, predicted + alpha * err, predicted)
+        trend = np.where(observed, beta * (new_level - level) + (1 - beta) * trend, trend)
+        level = new_level
+    return level, trend, sse
+
+
+def fit_holt(y, mask):
+    """Holt's linear smoothing for every row, with (alpha, beta) grid-searched per row."""
+    y = y.astype(np.float64)
+    n = y.shape[0]
+    best = np.full(n, np.inf)
+    level = np.full(n, np.nan)
+    trend = np.full(n, np.nan)
+    for alpha in HOLT_GRID:
+        for beta in HOLT_GRID:
+            lv, tr, sse = _holt_run(y, mask, alpha, beta)
+            better = sse < best
+            best = np.where(better, sse, best)
+            level = np.where(better, lv, level)
+            trend = np.where(better, tr, trend)
+    empty = ~mask.any(axis=1)
+    level[empty] = np.nan
+    trend[empty] = np.nan
+    return level, trend
+
+
+def fit(model, y, mask):
+    """Fit model to the rows of y; returns two parameter arrays."""
+    if model == "linear":
+        return fit_trend(y, mask)
+    if model == "exp":
+        return fit_trend(y, mask, log=True)
+    return fit_holt(y, mask)
+
+
+def project(model, params, n_points, horizon):
+    """Forecast `horizon` steps past the last of n_points for every series; shape (..., horizon)."""
+    p0, p1 = params
+    h = np.arange(1, horizon + 1, dtype=np.float64)
+    if model == "holt":
+        out = p0[..., None] + p1[..., None] * h
+    else:
+        out = p0[..., None] + p1[..., None] * (n_points - 1 + h)
+        if model == "exp":
+            out = np.expm1(out)
+    return np.maximum(out, 0.0)
+
+
+class Forecaster:
+    """Fitted trend parameters for every disease x state series of a CaseCube.
+
+    Parameters are fitted for all series at once and kept per model. After a
+    data change, mark_changed() records which series were touched, and the
+    next query refits only those rows instead of the whole cube.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cube = None
+        self._params = {}   # model -> (p0, p1), each D x S
+        self._dirty = {}    # model -> set of (d, s)
+
+    def mark_changed(self, cube, cells):
+        """Record that the given (disease, state, year[, cases]) cells of cube changed."""
+        with self._lock:
+            if cube is not self._cube:
+                return
+            series = {(cube.disease_idx[cell[0]], cube.state_idx[cell[1]]) for cell in cells}
+            for dirty in self._dirty.values():
+                dirty.update(series)
+
+    def params(self, cube, model):
+        with self._lock:
+            if cube is not self._cube:
+                self._cube = cube
+                self._params = {}
+                self._dirty = {}
+            if model not in self._params:
+                d, s, t = cube.counts.shape
+                p0, p1 = fit(model, cube.counts.reshape(d * s, t), cube.present.reshape(d * s, t))
+                self._params[model] = (p0.reshape(d, s), p1.reshape(d, s))
+                self._dirty[model] = set()
+            elif self._dirty[model]:
+                rows = tuple(np.array(list(self._dirty[model])).T)
+                p0, p1 = fit(model, cube.counts[rows], cube.present[rows])
+                self._params[model][0][rows] = p0
+                self._params[model][1][rows] = p1
+                self._dirty[model] = set()
+            return self._params[model]
+
+    def forecast(self, cube, model, disease=None, states=None, horizon=1):
+        """Projected counts for the years after the cube's last year.
+
+        Returns {"model", "years", "diseases": {disease: {state: [values]}}}
+        for one disease or all of them. Raises KeyError for unknown names and
+        ValueError for a bad model or horizon.
+        """
+        if model not in MODELS:
+            raise ValueError(f"model must be one of {', '.join(MODELS)}")
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f"horizon must be between 1 and {MAX_HORIZON}")
+        d_idx = [cube.disease_idx[disease]] if disease else list(range(len(cube.diseases)))
+        s_idx = [cube.state_idx[s] for s in states] if states else list(range(len(cube.states)))
+
+        sub = np.ix_(d_idx, s_idx)
+        with self._lock:
+            p0, p1 = self.params(cube, model)
+            p0, p1 = p0[sub], p1[sub]
+        values = project(model, (p0, p1), len(cube.years), horizon).round(1)
+        has_data = cube.present[sub].any(axis=2)
+
+        last = int(cube.years[-1])
+        result = {"model": model, "years": [str(last + i) for i in range(1, horizon + 1)], "diseases": {}}
+        state_names = [cube.states[s] for s in s_idx]
+        for d, rows, present in zip(d_idx, values.tolist(), has_data.tolist()):
+            result["diseases"][cube.diseases[d]] = {
+                name: row for name, row, ok in zip(state_names, rows, present) if ok
+            }
+        return result
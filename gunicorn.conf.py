@@ -0,0 +1,72 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py "serving:create_app()"
+
+Tunable through the environment:
+    DISEASE_APP_BIND              listen address (default 0.0.0.0:8000)
+    DISEASE_APP_WORKERS           worker processes (default 2 x CPUs + 1)
+    DISEASE_APP_THREADS           threads per worker (default 1)
+    DISEASE_APP_MAX_REQUESTS      recycle a worker after this many requests (default 10000, 0 = never)
+    DISEASE_APP_MAX_WORKER_MB     recycle a worker once its private memory (USS) exceeds this (0 = never)
+    DISEASE_APP_METRICS_DIR       where workers share /metrics snapshots (default instance/metrics);
+                                  emptied at startup
+"""
+import os
+
+import metrics
+import serving
+
+bind = os.environ.get("DISEASE_APP_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("DISEASE_APP_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+threads = int(os.environ.get("DISEASE_APP_THREADS", "1"))
+
+# load the app once in the master so workers share its read-only pages
+preload_app = True
+pidfile = serving.PIDFILE
+os.makedirs(os.path.dirname(pidfile), exist_ok=True)
+
+# set before the app is loaded so every worker's METRICS uses it
+METRICS_DIR = os.environ.setdefault(
+    "DISEASE_APP_METRICS_DIR", os.path.join(os.path.dirname(pidfile), "metrics"))
+
+# Recycling: a worker past its request budget (jittered so they do not all
+# restart together) or memory limit finishes its current request and exits;
+# the master forks a fresh one. Restarts (HUP) wait graceful_timeout for
+# in-flight requests.
+max_requests = int(os.environ.get("DISEASE_APP_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+graceful_timeout = 30
+timeout = 60
+
+MAX_WORKER_BYTES = int(os.environ.get("DISEASE_APP_MAX_WORKER_MB", "0")) * 1024 * 1024
+MEMORY_CHECK_EVERY = 100
+
+
+def on_starting(server):
+    # counters restart with the server; drop snapshots a previous run left behind
+    metrics.clear_snapshots(METRICS_DIR)
+
+
+def pre_fork(server, worker):
+    # also covers objects the master created since the app was loaded
+    serving.before_fork()
+
+
+def post_fork(server, worker):
+    serving.after_fork()
+
+
+def worker_exit(server, worker):
+    serving.before_exit()
+
+
+def child_exit(server, worker):
+    # the worker is gone: keep its counts in the totals, drop its gauges
+    metrics.retire_snapshot(METRICS_DIR, worker.pid)
+
+
+def post_request(worker, req, environ, resp):
+    if not MAX_WORKER_BYTES or worker.nr % MEMORY_CHECK_EVERY:
+        return
+    uss = metrics.process_memory().get("uss", 0)
+    if uss > MAX_WORKER_BYTES:
+        worker.log.info("Worker %s uses %.1f MiB private memory; recycling", worker.pid, uss / 1048576)
+        worker.alive = False
@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+class CachedBody:
+    """One serialized response together with its compressed variants."""
+
+    __slots__ = ("body", "status", "etag", "encoded")
+
+    def __init__(self, body, status, version):
+        self.body = body
+        self.status = status
+        self.etag = f"{version}-{hashlib.sha1(body).hexdigest()[:16]}"
+        self.encoded = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body, quality=5)
+
+
+class ResponseCache:
+    """Size-bounded LRU of serialized JSON bodies keyed by (key, data version)."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version, build):
+        """Return the CachedBody for key at version, calling build() -> (bytes, status) on a miss."""
+        full_key = (key, version)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                return entry
+
+        body, status = build()
+        entry = CachedBody(body, status, version)
+        with self._lock:
+            self._entries[full_key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _Pending:
+    __slots__ = ("done", "value", "error", "generation")
+
+    def __init__(self, generation):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.generation = generation
+
+
+class CoalescingCache:
+    """LRU memo of computed values with an optional TTL; concurrent misses compute once.
+
+    The first caller missing a key runs build() while callers asking for the
+    same key meanwhile wait for its result instead of repeating the work.
+    clear() drops every entry, and results of builds started before it are
+    not stored. Hits, misses and coalesced waits are counted for stats().
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # key -> (expires, value)
+        self._pending = {}              # key -> _Pending
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = 0
+
+    def get(self, key, build):
+        """Return the value cached for key, calling build() once on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending(self._generation)
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = build()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+                if pending.error is None and pending.generation == self._generation:
+                    expires = None if self.ttl is None else self.clock() + self.ttl
+                    self._entries[key] = (expires, pending.value)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            pending.done.set()
+        return pending.value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._generation += 1
+
+
+def respond(entry, mimetype="application/json"):
+    """Turn a CachedBody into a response, honouring If-None-Match and Accept-Encoding.
+
+    Only 200 bodies are validated: errors get no ETag and are never answered
+    with 304. Each encoding is its own representation, so compressed bodies
+    carry the ETag with an encoding suffix ("<etag>-gzip").
+    """
+    body, encoding = entry.body, None
+    for name in ("br", "gzip"):
+        if name in entry.encoded and request.accept_encodings[name]:
+            body, encoding = entry.encoded[name], name
+            break
+    etag = entry.etag if encoding is None else f"{entry.etag}-{encoding}"
+    if entry.status == 200 and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, status=entry.status, mimetype=mimetype)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    if entry.status == 200:
+        resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
@@ -0,0 +1,525 @@
+import bisect
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from datetime import datetime
+
+from flask import Response, abort, g, request
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STAGE_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# how often a worker publishes its snapshot when metrics are shared between processes
+SNAPSHOT_INTERVAL = 1.0
+RETIRED_SNAPSHOT = "retired.json"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.sum += other.sum
+        self.count += other.count
+
+    def copy(self):
+        h = Histogram(self.buckets)
+        h.merge(self)
+        return h
+
+
+def _labels(**labels):
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+# (name, type, help, Metrics attribute, label names) of the built-in families, in output order
+_TABLES = (
+    ("http_request_duration_seconds", "histogram", "Request latency by endpoint.",
+     "latency", ("endpoint", "method")),
+    ("http_requests_total", "counter", "Requests by endpoint and status.",
+     "requests", ("endpoint", "method", "status")),
+    ("http_request_exceptions_total", "counter", "Unhandled exceptions by endpoint.",
+     "errors", ("endpoint",)),
+    ("http_request_size_bytes", "histogram", "Request body size by endpoint.",
+     "request_size", ("endpoint",)),
+    ("http_response_size_bytes", "histogram",
+     "Response body size by endpoint (streamed responses are not counted).",
+     "response_size", ("endpoint",)),
+    ("app_stage_duration_seconds", "histogram", "Time spent in internal stages.",
+     "stages", ("stage",)),
+)
+
+
+class Metrics:
+    """Request and stage metrics, rendered in Prometheus text format.
+
+    Stage timings sit on hot paths, so each thread records them into its
+    own table without taking the lock; render() merges the tables.
+
+    Without a directory the numbers cover this process only. Behind a
+    pre-forking server each scrape lands on a random worker, so pass a
+    directory shared by the workers and call start_flusher() in each worker:
+    it then writes a snapshot of its metrics there every SNAPSHOT_INTERVAL
+    seconds while it has recorded something new (and on render), even once
+    the worker is idle, and render() reports counters and histograms summed over all workers,
+    including ones that have exited (see retire_snapshot), and gauges per
+    live worker with a pid label.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._dirty = False      # recorded since the last snapshot
+        self._lock = threading.Lock()
+        self.latency = {}        # (endpoint, method) -> Histogram
+        self.requests = {}       # (endpoint, method, status) -> count
+        self.errors = {}         # endpoint -> unhandled exceptions
+        self.response_size = {}  # endpoint -> Histogram
+        self.request_size = {}   # endpoint -> Histogram
+        self.collectors = {}     # name -> (type, help, callable returning {labels tuple: value})
+        self._local = threading.local()
+        self._stage_tables = []  # (thread, {stage: Histogram}) for every thread that recorded one
+        self._retired_stages = {}  # stage -> Histogram folded in from finished threads
+
+    def _histogram(self, table, key, buckets):
+        h = table.get(key)
+        if h is None:
+            h = table[key] = Histogram(buckets)
+        return h
+
+    def observe_request(self, endpoint, method, status, seconds, request_bytes, response_bytes):
+        with self._lock:
+            self._histogram(self.latency, (endpoint, method), LATENCY_BUCKETS).observe(seconds)
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if request_bytes:
+                self._histogram(self.request_size, endpoint, SIZE_BUCKETS).observe(request_bytes)
+            if response_bytes is not None:
+                self._histogram(self.response_size, endpoint, SIZE_BUCKETS).observe(response_bytes)
+            self._dirty = True
+
+    def observe_error(self, endpoint):
+        with self._lock:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self._dirty = True
+
+    def after_fork(self):
+        """Forget anything inherited from the parent, so a forked worker counts only its own requests."""
+        with self._lock:
+            for _, _, _, attr, _ in _TABLES:
+                if attr != "stages":
+                    getattr(self, attr).clear()
+            self._local = threading.local()
+            self._stage_tables = []
+            self._retired_stages = {}
+            self._dirty = False
+
+    def start_flusher(self, interval=SNAPSHOT_INTERVAL):
+        """Publish the snapshot every interval seconds while there is something new.
+
+        Call once per worker after forking; threads do not survive fork().
+        """
+        def flush():
+            while True:
+                time.sleep(interval)
+                if self._dirty:
+                    try:
+                        self.write_snapshot()
+                    except OSError:
+                        self._dirty = True  # try again next interval
+
+        threading.Thread(target=flush, name="metrics-flush", daemon=True).start()
+
+    def observe_stage(self, name, seconds):
+        try:
+            table = self._local.stages
+        except AttributeError:
+            table = self._local.stages = {}
+            with self._lock:
+                self._retire_finished_threads()
+                self._stage_tables.append((threading.current_thread(), table))
+        h = table.get(name)
+        if h is None:
+            h = table[name] = Histogram(STAGE_BUCKETS)
+        h.observe(seconds)
+
+    def _retire_finished_threads(self):
+        # servers that start a thread per request would otherwise grow this list forever
+        live = []
+        for thread, table in self._stage_tables:
+            if thread.is_alive():
+                live.append((thread, table))
+            else:
+                for name, h in table.items():
+                    self._histogram(self._retired_stages, name, STAGE_BUCKETS).merge(h)
+        self._stage_tables = live
+
+    @property
+    def stages(self):
+        """{stage: Histogram} merged over all threads."""
+        merged = {}
+        with self._lock:
+            tables = [self._retired_stages] + [table for _, table in self._stage_tables]
+            for table in tables:
+                for name, h in list(table.items()):
+                    self._histogram(merged, name, STAGE_BUCKETS).merge(h)
+        return merged
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block of internal work, e.g. `with METRICS.stage("scoring"): ...`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def gauge(self, name, help_text, collect):
+        """Register a gauge; collect() returns {((label, value), ...): number}."""
+        self.collectors[name] = ("gauge", help_text, collect)
+
+    def counter(self, name, help_text, collect):
+        """Register a counter kept elsewhere; collect() returns {((label, value), ...): total since start}."""
+        self.collectors[name] = ("counter", help_text, collect)
+
+    def families(self):
+        """{name: (type, help, {labels: value or Histogram})} recorded in this process."""
+        out = {}
+        with self._lock:
+            for name, kind, help_text, attr, label_names in _TABLES:
+                if attr != "stages":
+                    out[name] = (kind, help_text, _labelled(getattr(self, attr), label_names))
+            collectors = list(self.collectors.items())
+        name, kind, help_text, _, label_names = _TABLES[-1]
+        out[name] = (kind, help_text, _labelled(self.stages, label_names))
+        for name, (kind, help_text, collect) in collectors:
+            out[name] = (kind, help_text, {tuple(labels): value for labels, value in collect().items()})
+        return out
+
+    def write_snapshot(self):
+        """Publish this process's metrics to the shared directory."""
+        self._dirty = False
+        families = self.families()
+        pid = os.getpid()
+        for kind, _, samples in families.values():
+            if kind == "gauge":
+                for labels in list(samples):
+                    if "pid" not in dict(labels):
+                        samples[labels + (("pid", pid),)] = samples.pop(labels)
+        _write_json(os.path.join(self.directory, f"worker-{pid}.json"), _encode(families))
+
+    def render(self):
+        if self.directory is None:
+            return _format(self.families())
+        self.write_snapshot()
+        return _format(read_snapshots(self.directory))
+
+
+def _labelled(table, label_names):
+    samples = {}
+    for key, value in table.items():
+        values = key if isinstance(key, tuple) else (key,)
+        samples[tuple(zip(label_names, values))] = value.copy() if isinstance(value, Histogram) else value
+    return samples
+
+
+def _format(families):
+    out = []
+    for name, (kind, help_text, samples) in families.items():
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(samples.items()):
+            base = dict(labels)
+            if kind != "histogram":
+                out.append(f"{name}{_labels(**base) if base else ''} {value}")
+                continue
+            cumulative = 0
+            for bound, n in zip(value.buckets, value.counts):
+                cumulative += n
+                out.append(f"{name}_bucket{_labels(**base, le=bound)} {cumulative}")
+            out.append(f"{name}_bucket{_labels(**base, le='+Inf')} {value.count}")
+            out.append(f"{name}_sum{_labels(**base)} {value.sum}")
+            out.append(f"{name}_count{_labels(**base)} {value.count}")
+    return "\n".join(out) + "\n"
+
+
+# --------- Sharing metrics between worker processes ----------
+# Snapshots are JSON: {name: [type, help, [[labels, value], ...]]} with labels
+# as [[label, value], ...] and histograms as [buckets, counts, sum, count].
+
+def _encode(families):
+    out = {}
+    for name, (kind, help_text, samples) in families.items():
+        rows = []
+        for labels, value in samples.items():
+            if isinstance(value, Histogram):
+                value = [list(value.buckets), value.counts, value.sum, value.count]
+            rows.append([[list(pair) for pair in labels], value])
+        out[name] = [kind, help_text, rows]
+    return out
+
+
+def _merge(total, snapshot, gauges=True):
+    """Add a decoded snapshot into total ({name: (type, help, samples)}); counters and histograms are summed."""
+    for name, (kind, help_text, rows) in snapshot.items():
+        if kind == "gauge" and not gauges:
+            continue
+        samples = total.setdefault(name, (kind, help_text, {}))[2]
+        for labels, value in rows:
+            labels = tuple(tuple(pair) for pair in labels)
+            if kind == "histogram":
+                buckets, counts, total_sum, count = value
+                h = samples.get(labels)
+                if h is None:
+                    h = samples[labels] = Histogram(tuple(buckets))
+                h.counts = [a + b for a, b in zip(h.counts, counts)]
+                h.sum += total_sum
+                h.count += count
+            elif kind == "counter":
+                samples[labels] = samples.get(labels, 0) + value
+            else:
+                samples[labels] = value
+    return total
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+@contextlib.contextmanager
+def _directory_lock(directory, mode):
+    import fcntl  # POSIX only, like the pre-forking servers that need it
+
+    with open(os.path.join(directory, ".lock"), "a") as f:
+        fcntl.flock(f, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_snapshots(directory):
+    """Merge the retired snapshot and every live worker's snapshot in directory."""
+    import fcntl
+
+    total = {}
+    with _directory_lock(directory, fcntl.LOCK_SH):
+        retired = _read_json(os.path.join(directory, RETIRED_SNAPSHOT))
+        if retired:
+            _merge(total, retired, gauges=False)
+        for name in sorted(os.listdir(directory)):
+            if name.startswith("worker-") and name.endswith(".json"):
+                snapshot = _read_json(os.path.join(directory, name))
+                if snapshot:
+                    _merge(total, snapshot)
+    return total
+
+
+def retire_snapshot(directory, pid):
+    """Fold an exited worker's counters into the retired snapshot so totals never go down.
+
+    Call from the parent once the worker has exited; its gauges are dropped.
+    """
+    import fcntl
+
+    path = os.path.join(directory, f"worker-{pid}.json")
+    with _directory_lock(directory, fcntl.LOCK_EX):
+        snapshot = _read_json(path)
+        if snapshot is None:
+            return
+        total = {}
+        retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+        _merge(total, _read_json(retired_path) or {}, gauges=False)
+        _merge(total, snapshot, gauges=False)
+        _write_json(retired_path, _encode(total))
+        os.remove(path)
+
+
+def clear_snapshots(directory):
+    """Start the shared directory afresh (call in the parent before forking workers)."""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(directory, name))
+
+
+def process_memory(pid="self"):
+    """Resident memory of a process in bytes, from /proc/<pid>/smaps_rollup (Linux only).
+
+    rss counts every resident page, pss splits shared pages between the
+    processes mapping them, and uss counts only pages private to this
+    process, i.e. what exiting it would free. Returns {} where unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    kb = {}
+    for line in lines:
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if len(parts) == 2 and parts[1] == "kB":
+            kb[name] = int(parts[0])
+    return {
+        "rss": kb.get("Rss", 0) * 1024,
+        "pss": kb.get("Pss", 0) * 1024,
+        "uss": (kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) * 1024,
+        "shared": (kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) * 1024,
+    }
+
+
+class Profiler:
+    """Opt-in cProfile of single requests.
+
+    Disabled unless DISEASE_APP_PROFILING=1. A request is profiled when it
+    sends an `X-Profile: 1` header, or at random with probability
+    DISEASE_APP_PROFILE_SAMPLE. Profiles are saved as .prof files (load them
+    with pstats or snakeviz) and named in the X-Profile-Id response header;
+    GET /debug/profiles/<id> returns the top functions as text. Only the
+    newest max_profiles files are kept.
+
+    One request per process is profiled at a time; others arriving meanwhile
+    are served unprofiled. From Python 3.12 cProfile is interpreter-wide and
+    refuses a second active profiler, and even a single profile records every
+    thread, so with several threads per worker a profile can include
+    functions of concurrent requests.
+    """
+
+    def __init__(self, directory, enabled=False, sample_rate=0.0, max_profiles=200):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self._busy = threading.Lock()
+
+    def wanted(self):
+        if not self.enabled:
+            return False
+        if request.headers.get("X-Profile") == "1":
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Start profiling this request if wanted and none is being profiled; returns the profile or None."""
+        if not self.wanted() or not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler (a debugger, coverage) is active
+            self._busy.release()
+            return None
+        return profile
+
+    def stop(self, profile):
+        profile.disable()
+        self._busy.release()
+
+    def save(self, profile, endpoint):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{endpoint}"
+        profile.dump_stats(os.path.join(self.directory, profile_id + ".prof"))
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        # ids start with a timestamp, so name order is age order
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".prof"))
+        for name in names[:-self.max_profiles]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def report(self, profile_id, limit=40):
+        path = os.path.join(self.directory, os.path.basename(profile_id) + ".prof")
+        if not os.path.exists(path):
+            return None
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+def init_app(app, metrics, profiler):
+    """Install request instrumentation, /metrics and /debug/profiles/<id> on app."""
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+        profile = profiler.start()
+        if profile is not None:
+            g.profile = profile
+
+    @app.after_request
+    def _record_request(response):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.stop(profile)
+            response.headers["X-Profile-Id"] = profiler.save(profile, request.endpoint or "unknown")
+        started = g.pop("request_started", None)
+        if started is not None:
+            metrics.observe_request(
+                request.endpoint or "unknown",
+                request.method,
+                response.status_code,
+                time.perf_counter() - started,
+                request.content_length,
+                None if response.is_streamed else response.calculate_content_length(),
+            )
+        return response
+
+    @app.teardown_request
+    def _record_exception(exc):
+        if exc is not None:
+            metrics.observe_error(request.endpoint or "unknown")
+            profile = g.pop("profile", None)
+            if profile is not None:
+                profiler.stop(profile)
+
+    @app.route("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/debug/profiles/<profile_id>")
+    def profile_report(profile_id):
+        if not profiler.enabled:
+            abort(404)
+        text = profiler.report(profile_id)
+        if text is None:
+            abort(404)
+        return Response(text, mimetype="text/plain")
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+MAX_FAILED_JOBS = 100
+
+
+class RenderUnavailable(RuntimeError):
+    """The render pool cannot take jobs right now (a worker died); retry later."""
+
+
+def render_pdf(results, lang, generated_at):
+    """Draw the prediction results report and return the PDF bytes."""
+    # reportlab is only imported by the first report, not at app startup
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, height-40, f"Prediction Results ({lang}) - {generated_at}")
+    y = height - 70
+    c.setFont("Helvetica", 11)
+
+    for r in results:
+        if y < 80:
+            c.showPage()
+            y = height - 50
+            c.setFont("Helvetica", 11)
+        c.drawString(40, y, f"{r['disease']} — {r['probability']}% — Matched: {', '.join(r.get('matched_symptoms', []))}")
+        y -= 16
+        advice = r.get("advice","")
+        for i in range(0, len(advice), 90):
+            c.drawString(60, y, advice[i:i+90])
+            y -= 12
+        y -= 8
+
+    c.save()
+    return buf.getvalue()
+
+
+def _failed(future):
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+def report_key(results, lang):
+    """Content hash identifying a report; identical payloads share one PDF."""
+    payload = json.dumps([results, lang], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfRenderer:
+    """Renders reports in a process pool and keeps finished PDFs in a byte-bounded LRU.
+
+    Reports with at most sync_max_results rows are drawn inline (spawning a
+    job costs more than drawing them); larger ones run in worker processes
+    so they never hold the GIL of the process serving the API, and callers
+    poll for them instead of waiting. Cached PDFs keep the timestamp of
+    their first rendering.
+    """
+
+    def __init__(self, max_workers=None, cache_bytes=32 * 1024 * 1024, sync_max_results=20):
+        self.max_workers = max_workers
+        self.cache_bytes = cache_bytes
+        self.sync_max_results = sync_max_results
+        self._cache = OrderedDict()
+        self._cached_size = 0
+        self._jobs = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a threaded server process. The children
+                # re-run the parent's main script, which is gunicorn's or the
+                # flask CLI's launcher, never app.py (see its __main__ block).
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers or min(4, os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def cached(self, key):
+        with self._lock:
+            pdf = self._cache.get(key)
+            if pdf is not None:
+                self._cache.move_to_end(key)
+            return pdf
+
+    def _store(self, key, pdf):
+        with self._lock:
+            if key in self._cache or len(pdf) > self.cache_bytes:
+                return
+            self._cache[key] = pdf
+            self._cached_size += len(pdf)
+            while self._cached_size > self.cache_bytes:
+                _, old = self._cache.popitem(last=False)
+                self._cached_size -= len(old)
+
+    def submit(self, results, lang):
+        """Queue a report and return its job id (the report key).
+
+        Raises RenderUnavailable if the pool is broken; the next call starts
+        a fresh one.
+        """
+        key = report_key(results, lang)
+        if self.cached(key) is not None:
+            return key
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        executor = self._executor()
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None and not _failed(future):
+                return key
+            try:
+                future = executor.submit(render_pdf, results, lang, generated_at)
+            except BrokenProcessPool as e:
+                # a worker died (e.g. OOM-killed); start a fresh pool
+                self._pool = None
+                raise RenderUnavailable("PDF rendering is temporarily unavailable") from e
+            self._jobs[key] = future
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return key
+
+    def _finish(self, key, future):
+        if _failed(future):
+            # keep failures visible to status() but don't let them pile up
+            with self._lock:
+                failed = [k for k, f in self._jobs.items() if f.done()]
+                for k in failed[:-MAX_FAILED_JOBS]:
+                    del self._jobs[k]
+            return
+        self._store(key, future.result())
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def status(self, key):
+        """Return "done", "pending", "failed" or None for an unknown job."""
+        if self.cached(key) is not None:
+            return "done"
+        with self._lock:
+            future = self._jobs.get(key)
+        if future is None:
+            return None
+        if not future.done():
+            return "pending"
+        return "failed" if _failed(future) else "done"
+
+    def result(self, key):
+        """Return the PDF bytes of a finished job, or None."""
+        pdf = self.cached(key)
+        if pdf is not None:
+            return pdf
+        with self._lock:
+            future = self._jobs.get(key)
+        if future is not None and future.done() and not _failed(future):
+            return future.result()
+        return None
+
+    def render(self, results, lang):
+        """Return the PDF for a cached or small report, or None if it must go through submit()."""
+        key = report_key(results, lang)
+        pdf = self.cached(key)
+        if pdf is not None or len(results) > self.sync_max_results:
+            return pdf
+        pdf = render_pdf(results, lang, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self._store(key, pdf)
+        return pdf
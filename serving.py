@@ -0,0 +1,140 @@
+"""Production serving: app factory, pre-fork warm-up and per-worker memory.
+
+Serve with several pre-forked workers (settings in gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py "serving:create_app()"
+
+The app is loaded once in the master. Everything workers only read (the
+symptom/disease/advice tables, the prediction and fuzzy-match indexes, the
+case cube and fitted forecasts) is built there and then moved out of the
+garbage collector's reach with gc.freeze(), so collections in the workers
+do not write to those objects and their pages stay shared copy-on-write.
+
+    python serving.py [MASTER_PID]
+
+prints each worker's resident memory; USS is what a worker really costs.
+
+The workers share a metrics directory (DISEASE_APP_METRICS_DIR, see
+gunicorn.conf.py), so /metrics reports totals over all workers whichever
+one answers the scrape.
+
+create_app() is not a factory: the Flask app and its state are module-level
+globals of app.py, so every call returns the same app. Load it once per
+process, as gunicorn does with preload_app.
+"""
+import gc
+import os
+import sys
+
+import metrics
+
+PIDFILE = os.environ.get(
+    "DISEASE_APP_PIDFILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "gunicorn.pid"),
+)
+
+
+def create_app():
+    """Return the app with its read-only state built and frozen, ready to fork.
+
+    This is the module-level app.app singleton, created when app.py is first
+    imported; calling create_app() again does not build a second app.
+    """
+    import app as disease_app
+
+    warm(disease_app)
+    before_fork()
+    return disease_app.app
+
+
+def warm(module):
+    """Build the state the app otherwise builds lazily on first use."""
+    import forecast
+
+    cases = module.get_cases()
+    module._batch_matrices(module.SYMPTOM_INDEX)
+    module.SYMPTOM_INDEX["matcher"].prepare()
+    for model in forecast.MODELS:
+        module.get_forecaster().params(cases, model)
+
+
+def freeze():
+    """Move every object alive now to the GC's permanent generation; call right before forking."""
+    gc.collect()
+    gc.freeze()
+
+
+def before_fork():
+    """Master-side preparation for fork(): close the SQLite connection opened at import, then freeze."""
+    import app as disease_app
+
+    disease_app.STORE.close()
+    freeze()
+
+
+def after_fork():
+    """Per-worker setup after fork(): drop resources that must not be shared."""
+    import app as disease_app
+
+    disease_app.STORE.after_fork()
+    disease_app.METRICS.after_fork()
+    if disease_app.METRICS.directory is not None:
+        disease_app.METRICS.start_flusher()
+
+
+def before_exit():
+    """Publish the exiting worker's final metrics so the parent can retire them."""
+    import app as disease_app
+
+    if disease_app.METRICS.directory is not None:
+        disease_app.METRICS.write_snapshot()
+
+
+def worker_pids(master_pid):
+    """PIDs of the processes whose parent is master_pid."""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii", errors="replace") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # the command name may contain spaces; fields after it are: state ppid ...
+        if int(stat.rsplit(")", 1)[1].split()[1]) == master_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def memory_report(master_pid):
+    """Rows of (role, pid, memory dict) for the master and each of its workers."""
+    rows = [("master", master_pid, metrics.process_memory(master_pid))]
+    rows += [("worker", pid, metrics.process_memory(pid)) for pid in worker_pids(master_pid)]
+    return rows
+
+
+def main(argv):
+    if argv:
+        master_pid = int(argv[0])
+    else:
+        try:
+            with open(PIDFILE, encoding="ascii") as f:
+                master_pid = int(f.read().strip())
+        except (OSError, ValueError):
+            sys.exit(f"no master PID given and none readable from {PIDFILE}")
+
+    mib = 1024 * 1024
+    rows = memory_report(master_pid)
+    if not rows[0][2]:
+        sys.exit(f"cannot read /proc/{master_pid}/smaps_rollup")
+    print(f"{'role':<8}{'pid':>8}{'rss MiB':>10}{'pss MiB':>10}{'uss MiB':>10}{'shared MiB':>12}")
+    for role, pid, mem in rows:
+        print(f"{role:<8}{pid:>8}{mem.get('rss', 0) / mib:>10.1f}{mem.get('pss', 0) / mib:>10.1f}"
+              f"{mem.get('uss', 0) / mib:>10.1f}{mem.get('shared', 0) / mib:>12.1f}")
+    total = sum(mem.get("pss", 0) for _, _, mem in rows)
+    print(f"total (sum of pss): {total / mib:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
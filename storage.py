@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    disease TEXT NOT NULL,
+    state   TEXT NOT NULL,
+    year    TEXT NOT NULL,
+    cases   INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (disease, state, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cases_version ON cases (version);
+"""
+
+UPSERT = """
+INSERT INTO cases (disease, state, year, cases, version) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (disease, state, year) DO UPDATE SET cases = excluded.cases, version = excluded.version
+"""
+
+
+class CaseStore:
+    """SQLite (WAL mode) persistence for case counts, shared by all worker processes.
+
+    The database's user_version is the data version: every batch of writes
+    bumps it by one and stamps the rows it touched with the new value, so a
+    process can check for changes with a single PRAGMA and fetch only the rows
+    written after the version it already has.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit; write transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection; the next call opens a new one.
+
+        SQLite handles must not cross fork(): a parent calls this before
+        forking, since closing an inherited handle in the child is not safe.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    def after_fork(self):
+        """Reset per-thread state in a forked child, which opens its own connections."""
+        self._local = threading.local()
+
+    def version(self):
+        return self._conn().execute("PRAGMA user_version").fetchone()[0]
+
+    def write_many(self, rows):
+        """Upsert (disease, state, year, cases) rows in one transaction; returns the new version."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0] + 1
+            conn.executemany(UPSERT, ((d, s, str(y), int(c), version) for d, s, y, c in rows))
+            conn.execute(f"PRAGMA user_version = {version:d}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def seed(self, rows):
+        """Write rows only if the store is empty (first start); returns the current version."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM cases LIMIT 1").fetchone() is None:
+                conn.executemany(UPSERT, ((d, s, str(y), int(c), 1) for d, s, y, c in rows))
+                conn.execute("PRAGMA user_version = 1")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.version()
+
+    def changes_since(self, version):
+        """Return (current version, rows written after version) from one consistent snapshot."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            rows = conn.execute(
+                "SELECT disease, state, year, cases FROM cases WHERE version > ?", (version,)
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return current, rows
@@ -0,0 +1,207 @@
+import re
+import unicodedata
+
+DEFAULT_THRESHOLD = 0.6
+# every word of the query must match a word of the term at least this well
+TOKEN_THRESHOLD = 0.5
+# candidates above the threshold checked word by word, best first
+MAX_CANDIDATES = 8
+# a one-letter typo leaves a short word few trigrams ("fevr" vs "fever" is
+# 0.55, "थकन" vs "थकान" 0.44), so candidates down to this score are accepted
+# when they are within max_edits() of the query
+EDIT_FLOOR = 0.4
+# a query holding one of these ("no fever") never matches a term without it
+NEGATIONS = frozenset({
+    "no", "not", "non", "without", "never", "none", "nil", "denies",
+    "नहीं", "नही", "न", "बिना", "नाही", "नको", "विना",
+})
+_SEPARATORS = re.compile(r"[\s\-_/.,;:]+")
+
+
+def normalize_text(text):
+    """Lowercase, NFC-normalize and collapse separators ("Sore-Throat " -> "sore throat")."""
+    text = unicodedata.normalize("NFC", text).lower()
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a, b):
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def max_edits(text):
+    """Typos tolerated by the edit-distance check: none below 3 characters, 2 from 8 on."""
+    n = len(text)
+    return 0 if n < 3 else 1 if n < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance counting a swap of neighbours as one edit; limit + 1 once above limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # a typo is usually local: only the differing middle needs the table
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    before, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, before[j - 2] + 1)
+            row.append(d)
+        if min(row) > limit:
+            return limit + 1
+        before, prev = prev, row
+    return prev[-1]
+
+
+class SymptomMatcher:
+    """Resolve free-text symptoms to canonical English symptoms via a trigram index.
+
+    terms maps every known spelling (English, Hindi, Marathi, synonyms) to
+    its canonical English symptom. Similarity is the Dice coefficient of the
+    two trigram sets. A lookup reads only the posting lists of the query's
+    trigrams and counts shared trigrams for all terms at once with numpy
+    (loaded on the first fuzzy lookup), so it stays fast as the vocabulary
+    grows, even when many terms share common trigrams.
+
+    A similar score alone is not a match: every word of the query must also
+    match some word of the term ("loss of appetite" is not "loss of taste"),
+    and a negated query ("no fever") only matches terms with the same
+    negation word. Short typos score below the threshold, so when nothing
+    passes, the best candidates down to EDIT_FLOOR are re-checked by edit
+    distance ("fevr" -> fever, "थकन" -> थकान).
+    """
+
+    def __init__(self, terms, threshold=DEFAULT_THRESHOLD, cache_size=10000):
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self._exact = {}
+        self._canonical = []
+        self._keys = []
+        self._words = []
+        self._sizes = []
+        self._postings = {}
+        self._arrays = None
+        self._cache = {}
+        for term, canonical in terms.items():
+            key = normalize_text(term)
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = canonical
+            term_id = len(self._canonical)
+            self._canonical.append(canonical)
+            self._keys.append(key)
+            self._words.append({w: trigrams(w) for w in key.split()})
+            grams = trigrams(key)
+            self._sizes.append(len(grams))
+            for g in grams:
+                self._postings.setdefault(g, []).append(term_id)
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def resolve(self, text):
+        """Return (canonical symptom, score) for text, or None if nothing matches."""
+        key = normalize_text(text)
+        if key in self._exact:
+            return self._exact[key], 1.0
+        result = self._cache.get(key, False)
+        if result is False:
+            result = self.match(key)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def prepare(self):
+        """Build the numpy posting arrays (done on the first fuzzy lookup otherwise)."""
+        import numpy as np
+
+        if self._arrays is None:
+            postings = {g: np.array(ids, dtype=np.int32) for g, ids in self._postings.items()}
+            self._arrays = postings, np.array(self._sizes, dtype=np.float64)
+        return self._arrays
+
+    def _covers(self, term_id, query_words, close):
+        """True if every query word has a counterpart in the term and no negation is added.
+
+        close memoizes word trigrams and word-to-word checks across the
+        candidates of one lookup.
+        """
+        term_words = self._words[term_id]
+        for word in query_words:
+            if word in term_words:
+                continue
+            if word in NEGATIONS:
+                return False
+            grams = close.get(word)
+            if grams is None:
+                grams = close[word] = trigrams(word)
+            for other, other_grams in term_words.items():
+                pair = (word, other)
+                ok = close.get(pair)
+                if ok is None:
+                    ok = close[pair] = _dice(grams, other_grams) >= TOKEN_THRESHOLD
+                if ok:
+                    break
+            else:
+                return False
+        return True
+
+    def match(self, key):
+        """Best fuzzy match for an already normalized key, bypassing the cache."""
+        import numpy as np
+
+        postings, sizes = self.prepare()
+        grams = trigrams(key)
+        hits = [postings[g] for g in grams if g in postings]
+        if not hits:
+            return None
+        common = np.bincount(np.concatenate(hits), minlength=len(sizes))
+        scores = 2.0 * common / (len(grams) + sizes)
+        best = int(scores.argmax())  # first of equal scores, i.e. vocabulary order
+        if scores[best] < EDIT_FLOOR:
+            return None
+        query_words = key.split()
+        close = {}
+        if scores[best] >= self.threshold and self._covers(best, query_words, close):
+            return self._canonical[best], round(float(scores[best]), 2)
+
+        # rarely needed: the next best candidates
+        candidates = self._candidates(scores, EDIT_FLOOR)
+        for term_id in candidates[1:]:
+            if scores[term_id] < self.threshold:
+                break
+            if self._covers(term_id, query_words, close):
+                return self._canonical[term_id], round(float(scores[term_id]), 2)
+        limit = max_edits(key)
+        if not limit:
+            return None
+        for term_id in candidates:
+            if (edit_distance(key, self._keys[term_id], limit) <= limit
+                    and not any(w in NEGATIONS and w not in self._words[term_id] for w in query_words)):
+                return self._canonical[term_id], round(float(scores[term_id]), 2)
+        return None
+
+    def _candidates(self, scores, floor):
+        """Ids of the MAX_CANDIDATES best terms scoring at least floor, best first."""
+        import numpy as np
+
+        above = np.flatnonzero(scores >= floor)
+        if len(above) > MAX_CANDIDATES:
+            # without sorting every term above the floor
+            kth = np.partition(scores[above], -MAX_CANDIDATES)[-MAX_CANDIDATES]
+            above = above[scores[above] >= kth]
+        # stable, so equal scores keep vocabulary order
+        return above[np.argsort(-scores[above], kind="stable")][:MAX_CANDIDATES].tolist()
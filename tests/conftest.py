@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# the app seeds its SQLite store at import; keep it out of instance/
+os.environ.setdefault("DISEASE_APP_DB", os.path.join(tempfile.mkdtemp(prefix="disease-app-"), "cases.db"))
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
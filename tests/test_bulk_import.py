@@ -0,0 +1,63 @@
+import io
+import zipfile
+
+import pytest
+
+import bulk_import
+
+
+def _import(app_module, text):
+    saved = []
+    report = bulk_import.import_cases(io.BytesIO(text.encode("utf-8")), "cases.csv",
+                                      app_module.get_cases(), saved.extend)
+    return report, saved
+
+
+def test_bulk_import_applies_update_form_rule(app_module):
+    cube = app_module.get_cases()
+    assert not cube.has("Common Cold", "Odisha", "2020")
+    report, saved = _import(app_module, "disease,state,year,cases\n"
+                                        "Common Cold,Odisha,2020,5\n"
+                                        "Malaria,Goa,2023,40\n")
+    assert report["rejected_rows"] == [{"line": 2, "reason": "No Common Cold record for Odisha in 2020"}]
+    assert saved == [("Malaria", "Goa", "2023", 40)]
+
+
+def test_bulk_import_rejects_bad_values(app_module):
+    report, saved = _import(app_module, "disease,state,year,cases\n"
+                                        "Flu,Goa,2023,1\n"
+                                        "Malaria,Goa,twenty,1\n"
+                                        "Malaria,Goa,2023,-4\n")
+    assert [r["reason"] for r in report["rejected_rows"]] == [
+        "Unknown disease 'Flu'", "Invalid year 'twenty'", "Cases cannot be negative",
+    ]
+    assert saved == []
+
+
+def test_bulk_import_unreadable_csv_is_a_client_error(client):
+    body = "disease,state,year,cases\nMalaria,Goa,2023," + "9" * 200000 + "\n"
+    resp = client.post("/update/bulk", data={"file": (io.BytesIO(body.encode()), "cases.csv")},
+                       content_type="multipart/form-data")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith("Cannot read CSV line 2: field larger than field limit")
+
+
+def test_bulk_import_broken_sheet_is_a_client_error(app_module):
+    from openpyxl import Workbook
+
+    buf = io.BytesIO()
+    wb = Workbook()
+    wb.active.append(["disease", "state", "year", "cases"])
+    wb.active.append(["Malaria", "Goa", 2023, 1])
+    wb.save(buf)
+    # keep the workbook loadable but truncate the sheet XML that is read lazily
+    broken = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as src, zipfile.ZipFile(broken, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = data[:len(data) // 2]
+            dst.writestr(item, data)
+    broken.seek(0)
+    with pytest.raises(bulk_import.BulkImportError, match="Cannot read workbook"):
+        bulk_import.import_cases(broken, "cases.xlsx", app_module.get_cases(), lambda rows: None)
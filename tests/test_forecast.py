@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import forecast
+from cases import CaseCube
+
+NESTED = {
+    "Malaria": {"Goa": {"2019": 40, "2020": 52, "2021": 47, "2023": 61}, "Kerala": {"2020": 5, "2021": 9}},
+    "Dengue": {"Goa": {"2019": 12, "2022": 30}, "Kerala": {"2019": 80, "2020": 75, "2021": 90, "2022": 120}},
+    "Typhoid": {"Goa": {"2021": 3}},
+}
+
+
+@pytest.mark.parametrize("model", forecast.MODELS)
+def test_refit_after_change_matches_full_fit(model):
+    cube = CaseCube.from_nested(NESTED)
+    forecaster = forecast.Forecaster()
+    forecaster.params(cube, model)
+
+    # a changed value, a new point in a gap and the first point of an empty series
+    cells = [("Malaria", "Goa", "2021", 70), ("Dengue", "Goa", "2020", 18), ("Typhoid", "Kerala", "2022", 4)]
+    for cell in cells:
+        cube.set(*cell)
+    forecaster.mark_changed(cube, cells)
+
+    refit = forecaster.params(cube, model)
+    full = forecast.Forecaster().params(cube, model)
+    for got, want in zip(refit, full):
+        np.testing.assert_allclose(got, want, equal_nan=True)
+
+
+@pytest.mark.parametrize("query", [
+    "horizon=0", f"horizon={forecast.MAX_HORIZON + 1}", "horizon=two", "model=arima",
+])
+def test_forecast_rejects_bad_arguments(client, query):
+    response = client.get(f"/api/stats/forecast?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_forecast_years_follow_horizon(client):
+    data = client.get("/api/stats/forecast?model=holt&horizon=3").get_json()
+    assert data["model"] == "holt"
+    assert len(data["years"]) == 3
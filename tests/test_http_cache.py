@@ -0,0 +1,118 @@
+import threading
+import time
+
+from http_cache import CoalescingCache
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _start(target, *args):
+    t = threading.Thread(target=target, args=args)
+    t.start()
+    return t
+
+
+def test_errors_are_not_validated(client):
+    first = client.get("/api/stats/data?disease=X")
+    assert first.status_code == 400
+    assert "ETag" not in first.headers
+    again = client.get("/api/stats/data?disease=X", headers={"If-None-Match": "*"})
+    assert again.status_code == 400
+    assert "error" in again.get_json()
+
+
+def test_each_encoding_has_its_own_etag(client):
+    plain = client.get("/api/stats/data")
+    gzipped = client.get("/api/stats/data", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert plain.headers["ETag"] != gzipped.headers["ETag"]
+    # a validator is only honoured for the representation it was issued for
+    assert client.get("/api/stats/data", headers={"If-None-Match": plain.headers["ETag"]}).status_code == 304
+    assert client.get("/api/stats/data", headers={"If-None-Match": plain.headers["ETag"],
+                                                  "Accept-Encoding": "gzip"}).status_code == 200
+    assert client.get("/api/stats/data", headers={"If-None-Match": gzipped.headers["ETag"],
+                                                  "Accept-Encoding": "gzip"}).status_code == 304
+
+
+def test_concurrent_misses_build_once():
+    cache = CoalescingCache()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    threads = [_start(lambda: results.append(cache.get("k", build))) for _ in range(5)]
+    _wait_for(lambda: cache.stats()["coalesced"] == 4)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == ["value"] * 5
+    assert cache.get("k", build) == "value"
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_after_ttl():
+    now = [100.0]
+    cache = CoalescingCache(ttl=10, clock=lambda: now[0])
+    assert cache.get("k", lambda: 1) == 1
+    now[0] += 9.9
+    assert cache.get("k", lambda: 2) == 1
+    now[0] += 0.1
+    assert cache.get("k", lambda: 3) == 3
+    assert cache.stats()["misses"] == 2
+
+
+def test_clear_during_build_drops_its_result():
+    cache = CoalescingCache()
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def build():
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    t = _start(lambda: results.append(cache.get("k", build)))
+    started.wait(5)
+    cache.clear()
+    release.set()
+    t.join()
+    assert results == ["stale"]  # its caller still gets it
+    assert len(cache) == 0
+    assert cache.get("k", lambda: "fresh") == "fresh"
+
+
+def test_build_error_reaches_waiting_callers():
+    cache = CoalescingCache()
+    release = threading.Event()
+    errors = []
+
+    def build():
+        release.wait(5)
+        raise ValueError("boom")
+
+    def lookup():
+        try:
+            cache.get("k", build)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [_start(lookup) for _ in range(3)]
+    _wait_for(lambda: cache.stats()["coalesced"] == 2)
+    release.set()
+    for t in threads:
+        t.join()
+    assert [str(e) for e in errors] == ["boom"] * 3
+    # failures are not cached
+    assert len(cache) == 0
+    assert cache.get("k", lambda: "ok") == "ok"
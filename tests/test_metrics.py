@@ -0,0 +1,130 @@
+import os
+import threading
+
+import flask
+
+import metrics
+
+
+def test_stages_from_all_threads_are_rendered():
+    m = metrics.Metrics()
+    m.observe_stage("scoring", 0.001)
+    workers = [threading.Thread(target=m.observe_stage, args=("scoring", 0.002)) for _ in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    # a new thread registering folds the finished ones into the retired table
+    t = threading.Thread(target=m.observe_stage, args=("normalization", 0.001))
+    t.start()
+    t.join()
+
+    assert m.stages["scoring"].count == 5
+    text = m.render()
+    assert 'app_stage_duration_seconds_count{stage="scoring"} 5' in text
+    assert 'app_stage_duration_seconds_count{stage="normalization"} 1' in text
+
+
+def test_profiler_only_honours_x_profile_1(tmp_path):
+    profiler = metrics.Profiler(str(tmp_path), enabled=True)
+    app = flask.Flask(__name__)
+    for value, wanted in (("1", True), ("0", False), ("false", False), ("", False)):
+        with app.test_request_context(headers={"X-Profile": value}):
+            assert profiler.wanted() is wanted, value
+
+
+def test_profiler_keeps_newest_profiles(tmp_path):
+    import cProfile
+
+    profiler = metrics.Profiler(str(tmp_path), enabled=True, max_profiles=3)
+    ids = []
+    for _ in range(5):
+        profile = cProfile.Profile()
+        profile.enable()
+        profile.disable()
+        ids.append(profiler.save(profile, "predict"))
+    assert sorted(p.stem for p in tmp_path.glob("*.prof")) == ids[-3:]
+
+
+def _serve_requests(directory, n):
+    m = metrics.Metrics(directory)
+    for _ in range(n):
+        m.observe_request("predict", "POST", 200, 0.001, 100, 200)
+    m.write_snapshot()
+
+
+def test_shared_directory_sums_workers_including_exited_ones(tmp_path):
+    import multiprocessing
+
+    directory = str(tmp_path)
+    metrics.clear_snapshots(directory)
+    ctx = multiprocessing.get_context("fork")
+    for n in (3, 4):
+        worker = ctx.Process(target=_serve_requests, args=(directory, n))
+        worker.start()
+        worker.join()
+        metrics.retire_snapshot(directory, worker.pid)
+
+    m = metrics.Metrics(directory)
+    m.gauge("app_data_version", "Data version.", lambda: {(): 7})
+    m.observe_request("predict", "POST", 200, 0.001, 100, 200)
+    text = m.render()
+    assert 'http_requests_total{endpoint="predict",method="POST",status="200"} 8' in text
+    assert 'http_request_duration_seconds_count{endpoint="predict",method="POST"} 8' in text
+    # gauges are reported per live process only
+    assert text.count("app_data_version{") == 1
+    assert f'app_data_version{{pid="{os.getpid()}"}} 7' in text
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ["retired.json", f"worker-{os.getpid()}.json"]
+
+
+def test_predict_cache_lookups_exported_as_counter(client):
+    client.post("/api/predict", json={"symptoms": ["fever", "cough"]})
+    client.post("/api/predict", json={"symptoms": ["cough", "fever"]})
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE app_predict_cache_lookups_total counter" in text
+    assert 'app_predict_cache_lookups_total{result="hits"}' in text
+    assert "app_predict_cache_lookups{" not in text
+
+
+def _serve_then_idle(directory, n, done):
+    m = metrics.Metrics(directory)
+    m.start_flusher(interval=0.05)
+    for _ in range(n):
+        m.observe_request("predict", "POST", 200, 0.001, 100, 200)
+    done.wait(5)
+
+
+def test_idle_worker_publishes_its_counts(tmp_path):
+    import multiprocessing
+    import time
+
+    directory = str(tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    done = ctx.Event()
+    worker = ctx.Process(target=_serve_then_idle, args=(directory, 5, done))
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            text = metrics.Metrics(directory).render()
+            if 'http_requests_total{endpoint="predict",method="POST",status="200"} 5' in text:
+                break
+            time.sleep(0.05)
+        else:
+            raise AssertionError("idle worker's requests never published")
+    finally:
+        done.set()
+        worker.join()
+
+
+def test_one_profiled_request_at_a_time(tmp_path):
+    profiler = metrics.Profiler(str(tmp_path), enabled=True)
+    app = flask.Flask(__name__)
+    with app.test_request_context(headers={"X-Profile": "1"}):
+        first = profiler.start()
+        assert first is not None
+        assert profiler.start() is None  # busy: served unprofiled
+        profiler.stop(first)
+        second = profiler.start()
+        assert second is not None
+        profiler.stop(second)
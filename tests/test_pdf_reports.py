@@ -0,0 +1,48 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pdf_reports
+
+
+def _rows(n):
+    return [{"disease": f"Disease {i}", "probability": 10.0, "advice": "Rest."} for i in range(n)]
+
+
+class _Executor:
+    def __init__(self, error=None):
+        self.error = error
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        if self.error:
+            raise self.error
+        self.submitted += 1
+        return Future()
+
+
+def test_small_report_is_rendered_inline(client):
+    resp = client.post("/download/pdf", json={"results": _rows(3), "lang": "en"})
+    assert resp.status_code == 200
+    assert resp.data.startswith(b"%PDF")
+
+
+def test_large_report_is_queued_not_waited_for(client, app_module, monkeypatch):
+    executor = _Executor()
+    monkeypatch.setattr(app_module, "PDF_RENDERER", pdf_reports.PdfRenderer())
+    monkeypatch.setattr(app_module.PDF_RENDERER, "_executor", lambda: executor)
+    resp = client.post("/download/pdf", json={"results": _rows(25), "lang": "en"})
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert body["status"] == "pending"
+    assert body["status_url"].endswith(body["job_id"])
+    assert executor.submitted == 1
+
+
+def test_broken_pool_returns_503(client, app_module, monkeypatch):
+    renderer = pdf_reports.PdfRenderer()
+    monkeypatch.setattr(app_module, "PDF_RENDERER", renderer)
+    monkeypatch.setattr(renderer, "_executor", lambda: _Executor(BrokenProcessPool("worker died")))
+    for url in ("/download/pdf", "/api/pdf/jobs"):
+        resp = client.post(url, json={"results": _rows(25), "lang": "en"})
+        assert resp.status_code == 503
+        assert "error" in resp.get_json()
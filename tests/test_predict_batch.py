@@ -0,0 +1,50 @@
+import json
+import random
+
+
+def _random_records(app_module, n, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        lang = rng.choice(("en", "hi", "mr"))
+        vocab = app_module.SYMPTOMS[lang]
+        records.append((rng.sample(vocab, rng.randint(0, 8)), lang))
+    return records
+
+
+def test_batch_matches_predict_from_symptoms(app_module):
+    records = _random_records(app_module, 5000)
+    probs = app_module.predict_batch(records)
+    for (symptoms, lang), row in zip(records, probs.tolist()):
+        single, _ = app_module.predict_from_symptoms(symptoms, lang)
+        assert {d: round(p, 1) for d, p in zip(app_module.DISEASES, row)} == single, (symptoms, lang)
+
+
+def test_batch_endpoint_matches_single_endpoint(client):
+    body = ["sore throat", "loss of smell", "yellow skin", "joint pain", "runny nose", "nausea", "cough"]
+    batch = client.post("/api/predict/batch", json={"records": [body]})
+    line = json.loads(batch.get_data(as_text=True).splitlines()[0])
+    single = client.post("/api/predict", json={"symptoms": body}).get_json()
+    assert line["probabilities"] == {r["disease"]: r["probability"] for r in single["results"]}
+
+
+def test_batch_rejects_bad_bodies_before_streaming(client):
+    for body in ([["fever"]], {"records": 5}, {"records": [], "lang": ["en"]}):
+        resp = client.post("/api/predict/batch", json=body)
+        assert resp.status_code == 400
+        assert "error" in resp.get_json()
+    resp = client.post("/api/predict/batch", data="not json", content_type="application/json")
+    assert resp.status_code == 400
+
+
+def test_batch_reports_per_record_errors(client):
+    lines = ['["fever"]', "{not json", '{"id": "x", "symptoms": "fever"}', '{"symptoms": ["cough"], "lang": 3}']
+    resp = client.post("/api/predict/batch", data="\n".join(lines) + "\n",
+                       content_type="application/x-ndjson")
+    assert resp.status_code == 200
+    out = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r["id"] for r in out] == [0, 1, "x", 3]
+    assert "probabilities" in out[0]
+    assert out[1]["error"] == "invalid JSON"
+    assert out[2]["error"] == "symptoms must be a list"
+    assert out[3]["error"] == "lang must be a string"
@@ -0,0 +1,70 @@
+import sqlite3
+
+from storage import CaseStore
+
+
+def test_close_reopens_on_next_use(tmp_path):
+    store = CaseStore(str(tmp_path / "cases.db"))
+    store.seed([("Malaria", "Goa", "2023", 40)])
+    conn = store._conn()
+    store.close()
+    assert store._conn() is not conn
+    assert store.version() == 1
+
+
+def test_update_form_surfaces_storage_errors(app_module, client, monkeypatch):
+    disease, by_state = next(iter(app_module.STATEWISE_YEARLY.items()))
+    state, by_year = next(iter(by_state.items()))
+    year = next(iter(by_year))
+    form = {"disease": disease, "state": state, "year": year}
+    monkeypatch.setattr(app_module, "render_template", lambda name, message, **context: message)
+
+    page = client.post("/update_data", data={**form, "cases": "many"}).get_data(as_text=True)
+    assert page == "Cases must be a number ❌"
+
+    def locked(rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(app_module.STORE, "write_many", locked)
+    response = client.post("/update_data", data={**form, "cases": "12"})
+    assert response.status_code == 500
+    assert "Cases must be a number" not in response.get_data(as_text=True)
+
+
+def test_writes_from_another_store_are_seen(tmp_path):
+    path = str(tmp_path / "cases.db")
+    reader, writer = CaseStore(path), CaseStore(path)
+    assert reader.seed([("Malaria", "Goa", "2023", 40), ("Dengue", "Goa", "2023", 7)]) == 1
+    assert writer.write_many([("Malaria", "Goa", 2023, 45)]) == 2
+    assert reader.version() == 2
+    assert reader.changes_since(1) == (2, [("Malaria", "Goa", "2023", 45)])
+    assert reader.changes_since(2) == (2, [])
+
+
+def test_seed_leaves_existing_rows_alone(tmp_path):
+    store = CaseStore(str(tmp_path / "cases.db"))
+    store.seed([("Malaria", "Goa", "2023", 40)])
+    store.write_many([("Malaria", "Goa", "2023", 45)])
+    assert store.seed([("Malaria", "Goa", "2023", 40), ("Dengue", "Goa", "2023", 7)]) == 2
+    assert sorted(store.changes_since(0)[1]) == [("Malaria", "Goa", "2023", 45)]
+
+
+def test_save_cases_invalidates_cached_responses(app_module, client):
+    cube = app_module.get_cases()
+    disease, by_state = next(iter(app_module.STATEWISE_YEARLY.items()))
+    state, by_year = next(iter(by_state.items()))
+    year = next(iter(by_year))
+    before = cube.get(disease, state, year)
+
+    etag = client.get("/api/stats/data").headers["ETag"]
+    assert len(app_module.RESPONSE_CACHE)
+    version = app_module.DATA_VERSION
+    try:
+        assert app_module.save_cases([(disease, state, year, before + 1)]) == version + 1
+        assert len(app_module.RESPONSE_CACHE) == 0
+        assert cube.get(disease, state, year) == before + 1
+        fresh = client.get("/api/stats/data", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.headers["ETag"] != etag
+    finally:
+        app_module.save_cases([(disease, state, year, before)])
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import symptom_match
+
+
+@pytest.fixture(scope="module")
+def matcher(app_module):
+    return app_module.SYMPTOM_INDEX["matcher"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("feaver", "fever"),
+    ("Sore-Throat ", "sore throat"),
+    ("headach", "headache"),
+    ("runy nose", "runny nose"),
+    ("jointpain", "joint pain"),
+    ("loose motion", "diarrhea"),
+    ("stomache ache", "abdominal pain"),
+    ("बुख़ार", "fever"),
+    ("डोकेदुखि", "headache"),
+    ("गंध न आन", "loss of smell"),
+    # one-letter typos of short words, below the trigram threshold
+    ("fevr", "fever"),
+    ("cogh", "cough"),
+    ("nausia", "nausea"),
+    ("बुखर", "fever"),
+    ("खासी", "cough"),
+    ("थकन", "fatigue"),
+])
+def test_resolves_typos_synonyms_and_variants(matcher, text, expected):
+    assert matcher.resolve(text)[0] == expected
+
+
+@pytest.mark.parametrize("text", [
+    "no fever", "no cough", "not fever", "without fever", "fever no", "बुखार नहीं",
+    "no fevr", "बुखर नहीं",
+    "loss of appetite", "loss of weight", "pain", "xyzzy",
+])
+def test_rejects_negated_and_unrelated_phrases(matcher, text):
+    assert matcher.resolve(text) is None
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("fevr", "fever", 1), ("fevre", "fever", 1), ("थकन", "थकान", 1),
+    ("kitten", "sitting", 3), ("abc", "xyz", 3), ("ab", "ba", 1),
+])
+def test_edit_distance_is_bounded(a, b, distance):
+    assert symptom_match.edit_distance(a, b, limit=2) == min(distance, 3)
+
+
+def test_short_typos_scored_in_predict(client):
+    data = client.post("/api/predict", json={"symptoms": ["बुखर", "खासी"], "lang": "hi"}).get_json()
+    assert {k: v["symptom"] for k, v in data["resolved"].items()} == {"बुखर": "fever", "खासी": "cough"}
+    assert data["results"][0]["probability"] > 0
+
+
+def test_every_query_word_must_match():
+    m = symptom_match.SymptomMatcher({"loss of taste": "loss of taste"}, threshold=0.3)
+    assert m.resolve("loss of tast") == ("loss of taste", 0.89)
+    assert m.resolve("loss of appetite") is None
+
+
+def test_negated_symptoms_are_not_scored(client):
+    data = client.post("/api/predict", json={"symptoms": ["no fever", "no cough"]}).get_json()
+    assert data["resolved"] == {"no fever": None, "no cough": None}
+    assert all(r["probability"] == 0.0 for r in data["results"])
+
+
+def test_negated_symptoms_are_not_scored_in_batch(client):
+    resp = client.post("/api/predict/batch", json={"records": [["no fever", "no cough"]]})
+    line = json.loads(resp.get_data(as_text=True).splitlines()[0])
+    assert set(line["probabilities"].values()) == {0.0}